@@ -5,7 +5,8 @@ A single file script to implement 2048 game with extended features. (by estylejt
 
     Prerequisites:
         Python3 with standard library if it is a plain .py file
-        Unblocked TCP port 80 if it runs as a game server
+        NumPy is optional, only needed to simulate with --vectorized
+        Unblocked TCP port 80 (or the one given by --port) if it runs as a game server
 
     Features:
         Run in server mode
@@ -16,6 +17,7 @@ A single file script to implement 2048 game with extended features. (by estylejt
         Robot is available to battle against
         Human player is available to battle against
         Logging
+        Replay and archive of games
 
     Usage:
         To run it in server mode, just simply:
@@ -34,14 +36,31 @@ A single file script to implement 2048 game with extended features. (by estylejt
 
         ATTENTION: CASE SENSITIVE
         Complete usage:
-            python3 2048.py [--localonly[=auto]]
+            python3 2048.py [--localonly[=auto] | --simulate=<games> [--seed=<seed>] [--vectorized]] [--workers=<workers>]
+                            [--replay=<log_file> [--uuid=<uuid>] [--ply=<ply>]] [--archive[=<top>]]
+                            [--host=<host>] [--port=<port>]
                             [--board_shape=<board_shape>] [--board_tiles=<board_tiles>]
                             [--attacker_type=<attacker_type>] [--defender_type=<attacker_type>]
             Explanation:
                 --localonly=auto    it disables Manual player and console interaction,
                                     it is useful to test robot players
-
-                parameters below are working only in console mode:
+                --simulate          it plays the given number of robot rounds without logging each step,
+                                    and prints statistics as JSON, it is useful to tune robot players,
+                                    --seed makes the batch reproducible
+                --vectorized        it plays all rounds of --simulate together with NumPy,
+                                    only for Random attacker against Random defender
+                --replay            it prints board_tiles of ended rounds recorded in a log file as JSON lines,
+                                    --uuid picks one round, --ply picks the situation after so many plies,
+                                    a ply is an instruction executed by either player, the final one by default
+                --archive           it prints statistics of ended online rounds archived under archive/ as JSON,
+                                    a leaderboard of the top rounds, 10 by default, and scores for each pair of player types
+                --workers           default is 1, how many processes play robot rounds in parallel,
+                                    it works with --simulate and --localonly=auto,
+                                    in server mode, default is 4, how many threads robot players think in
+                --host              default is empty which means all interfaces, server mode only
+                --port              default is 80, server mode only
+
+                parameters below are working only in console mode and with --simulate:
                 --board_shape       default is [4,4] which presents a usual game board
                 --board_tiles       default is [] which presents an empty board,
                                     this parameter is prior to board_shape,
@@ -56,11 +75,13 @@ A single file script to implement 2048 game with extended features. (by estylejt
                     Manual          only available in console mode
                     Online          only available in server mode, see below
                     Strategy        better replacement of random attacker
+                    Minimax         searches against defender replies within a time budget, the strongest attacker
                 defender_type:      it is the player who moves the tiles as in a usual game
                     Random          literally
                     Manual          only available in console mode
                     Online          only available in server mode, see below
                     Strategy        better replacement of random defender
+                    Search          looks ahead within a time budget, the strongest defender
 
     Online play:
         When it runs in server mode, a web application is exposed at:
@@ -84,9 +105,35 @@ A single file script to implement 2048 game with extended features. (by estylejt
         To get details, request:
             http://<your_ip_or_hostname>/?display&uuid=<one_36_characters_uuid>
             The attacker_wait and defender_wait indicate who is about to play when it's True.
+            The version increases each time the details change.
             When they are False, the game might have ended, but exception exists.
             The game is truly ended if round_score is not -1 and two wait-signals are both False.
 
+        To wait for changes instead of repeating display, request:
+            http://<your_ip_or_hostname>/?watch&uuid=<one_36_characters_uuid>&version=<version>
+            It responds the same as display as soon as the version is not the given one,
+            or after 25 seconds without any change, then request it again with the version responded.
+
+        To get the changes only, add since=<version> to display or watch instead of version=<version>:
+            http://<your_ip_or_hostname>/?watch&uuid=<one_36_characters_uuid>&since=<version>
+            Instead of board_tiles, it responds board_shape and changed_tiles,
+            changed_tiles is a list of [index,tile] which changed after the given version,
+            index is the position of the tile when board_tiles is flattened in row-major order.
+            If nothing changed after the given version, it responds HTTP status 304 without content.
+
+        To play over one connection instead, open a WebSocket to:
+            ws://<your_ip_or_hostname>/?socket&uuid=<one_36_characters_uuid>
+            Send the rest of QUERYSTRING as a text message, such as defend=0,1 or attack=giveup,
+            it's answered with the same JSON as the request above.
+            Meanwhile, changes are pushed as soon as they happen, the same as watch with since,
+            the first push has board_tiles and the others have changed_tiles.
+
+        To review an earlier situation of a game, request:
+            http://<your_ip_or_hostname>/?replay&uuid=<one_36_characters_uuid>&ply=<ply>
+            A ply is an instruction executed by either player, ply=0 is the initial board,
+            it responds board_tiles after the given number of plies, and ply_count of the game so far,
+            without ply, it responds the latest board_tiles.
+
         When attacker_wait is True, to play it, request:
             http://<your_ip_or_hostname>/?attack=<location>&uuid=<one_36_characters_uuid>
             The location is a comma separated string such as attack=1,3
@@ -115,16 +162,31 @@ A single file script to implement 2048 game with extended features. (by estylejt
 import random
 import json
 import sys
-import wsgiref.simple_server as wsgi
 import threading
 import queue
 import os
+import asyncio
+import struct
+import mmap
+import heapq
 from copy import deepcopy
-from datetime import datetime
-from time import sleep
-from uuid import uuid4
+from datetime import datetime,timedelta
+from time import sleep,monotonic
+from uuid import uuid4,UUID
 from math import log
+from itertools import product
 from urllib.parse import unquote
+from statistics import mean,median,quantiles
+from array import array
+from hashlib import sha1
+from base64 import b64encode,b64decode
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor,ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+try:
+    import numpy ### optional, only Board_Batch needs it
+except ImportError:
+    numpy=None
 
 class Board():
     """
@@ -132,17 +194,40 @@ class Board():
 
     key properties:
         __shape     tuple, visit by get_shape(), it cannot be changed after initialization
-        __tiles     list, visit by get_tiles(), it can be changed only by move() or place()
+        __strides   tuple, how far the next tile is in __cells along each dimension
+        __cells     array, exponents of tiles flattened in row-major order (0 for an empty tile),
+                    it can be changed only by move() or place()
+        __tiles     list, visit by get_tiles(), nested numbers rebuilt from __cells on demand,
+                    it is cached until next change of __cells
+        __movable   dictionary, {(dimension,direction):bool}, cached answers of can_move(),
+                    it is cleared on every change of __cells
 
     key methods:
         __init__()  to initialize an empty board or load an endgame
         place()     boolean, attacker's action
         move()      boolean, defender's action
+        slide()     tuple, the same as move() but returns steps and score
+        can_move()  boolean, whether move() would succeed, without changing the board
+        get_key()   a compact hashable image of tiles, for robots to remember boards
+        get_empty_locations() list, all locations where place() can succeed
+        legal_moves() list, all [dimension,direction] which can_move()
+        from_trusted() Board, load tiles known to be valid without validation, not for players' input
+        clone()     Board, an independent copy without validation
 
     Board class does not manage the play flow and life cycle
     Because the shape of board is customizable, not limited to 2D 4*4,
     the code is a little bit trickier in order to adapt variable dimension board
     """
+    __LANES={} ### {(shape,dimension,direction):lanes}, see __generate_lanes()
+    __NUMBERS=tuple([0]+[2**exponent for exponent in range(1,256)]) ### tile number of each exponent
+    __LOCATIONS={} ### {shape:tuple of locations in row-major order}, see get_empty_locations()
+
+    def __new__(cls,shape=(4,4),*,load_tiles=[]):
+        """a usual 4*4 board is served by Bit_Board transparently, see Bit_Board"""
+        if cls is Board and Bit_Board.is_applicable(shape,load_tiles):
+            cls=Bit_Board
+        return super().__new__(cls)
+
     def __init__(self,shape=(4,4),*,load_tiles=[]):
         """when load_tiles is provided properly, shape will be ignored"""
         if type(load_tiles) is list and len(load_tiles)>0:
@@ -163,7 +248,7 @@ class Board():
                         if max_depth==-1: max_depth=depth
                         if max_depth!=depth:
                             raise Exception("Shape of load_tiles is not regular")
-                        elif sub_tiles<0 or sub_tiles>0 and log(sub_tiles,2)%1!=0:
+                        elif sub_tiles<0 or sub_tiles==1 or sub_tiles>0 and log(sub_tiles,2)%1!=0: ### 1 has no exponent in __cells
                             raise Exception("At least one tile in load_tiles is not an appropriate number")
                         continue
                     else:
@@ -177,7 +262,10 @@ class Board():
                 if type(tiles[0])==list:
                     recursive_len(tiles[0])
             recursive_len(load_tiles) ### recursively load __shape property
-            self.__tiles=deepcopy(load_tiles)
+            flat_tiles=load_tiles
+            for dim in range(len(self.__shape)-1):
+                flat_tiles=[tile for sub_tiles in flat_tiles for tile in sub_tiles]
+            self.__cells=array("B",[tile.bit_length()-1 if tile>0 else 0 for tile in flat_tiles])
         else:
             if type(shape) is not tuple or len(shape)==0:
                 raise Exception("Shape is not properly specified")
@@ -190,82 +278,167 @@ class Board():
                     elif dim_length<2 or dim_length>10:
                         raise Exception("Shape is too small or too large")
             self.__shape=tuple(shape)
-            tile=0
-            for dim in range(len(self.__shape)-1,-1,-1): ### fill zero from inside out (inverted order)
-                tile=[deepcopy(tile) for count in range(self.__shape[dim])]
-            self.__tiles=tile
+            tile_count=1
+            for dim_length in self.__shape:
+                tile_count=tile_count*dim_length
+            self.__cells=array("B",bytes(tile_count))
+        self.__prepare()
+
+    def __prepare(self):
+        """figure out __strides for __shape and reset caches, once __shape and __cells are set"""
+        self.__strides=()
+        stride=1
+        for dim_length in reversed(self.__shape): ### the last dimension is contiguous
+            self.__strides=(stride,)+self.__strides
+            stride=stride*dim_length
+        self.__tiles=None
+        self.__movable={}
+
+    @classmethod
+    def from_trusted(cls,tiles):
+        """
+        load tiles which are known to be valid, for example, tiles from get_tiles() of another board
+
+        it skips every validation in __init__(), so never pass tiles from players to it,
+        every tile must be 0 or a power of 2 from 2 on, anything else is loaded wrongly without any error.
+        a usual 4*4 board is served by Bit_Board as well as Board(load_tiles=tiles)
+        """
+        if cls is Board and Bit_Board.is_applicable((),tiles):
+            return Bit_Board.from_trusted(tiles)
+        board=super().__new__(cls)
+        board.__shape=()
+        sub_tiles=tiles
+        while type(sub_tiles) is list:
+            board.__shape=board.__shape+(len(sub_tiles),)
+            sub_tiles=sub_tiles[0]
+        flat_tiles=tiles
+        for dim in range(len(board.__shape)-1):
+            flat_tiles=[tile for sub_tiles in flat_tiles for tile in sub_tiles]
+        board.__cells=array("B",[tile.bit_length()-1 if tile>0 else 0 for tile in flat_tiles])
+        board.__prepare()
+        return board
+
+    def clone(self):
+        """an independent copy of this board, without any validation"""
+        board=super().__new__(type(self))
+        board.__shape=self.__shape
+        board.__strides=self.__strides
+        board.__cells=self.__cells[:]
+        board.__tiles=None
+        board.__movable=self.__movable.copy()
+        return board
 
     def get_tiles(self):
+        if self.__tiles is None:
+            numbers=Board.__NUMBERS
+            tiles=[numbers[exponent] for exponent in self.__cells]
+            for dim_length in reversed(self.__shape[1:]): ### group from inside out
+                tiles=[tiles[index:index+dim_length] for index in range(0,len(tiles),dim_length)]
+            self.__tiles=tiles
         return self.__tiles
 
     def get_shape(self):
         return self.__shape
 
-    def __get_tile(self,location):
-        tile=self.__tiles
-        for dim in range(len(location)):
-            tile=tile[location[dim]]
-        return tile
-
-    def __set_tile(self,location,number):
-        """list is a by-ref object, use this feature to set a tile number"""
-        tile=self.__tiles
-        for dim in range(len(location)-1):
-            tile=tile[location[dim]]
-        tile[location[-1]]=number
-
-    def __generate_sequential_coordinates(self,dimension,direction):
+    def __generate_lanes(self,dimension,direction):
         """
-        prepare a ordered set of tiles to move one by one
+        prepare ordered lanes of tiles to move
 
-        the order is not unique
-        any order will be valid if the direction on the specific dimension is complied
+        a lane is a line of tiles along the dimension to be moved, as a slice of __cells
+        lanes never affect each other, so it doesn't mantter which lane moves first
+        it only does matter, in each lane, which tile moves first, the one nearest to the edge
         for example with a 3*3 board:
             0   2   0
             0   0   8
             4   4   4
-        supposing the movement is to left
-        it doesn't mantter which row moves first
-        it only does matter, in each row, which column moves first, the leftmost one
-        so, this method use little math to ensure the order
+        supposing the movement is to left (dimension is 1, direction is -1)
+        lanes are rows, offsets (0,1,2), (3,4,5) and (6,7,8), which is slice(start,start+3*stride,stride)
+        supposing the movement is to right, each lane is reversed as (2,1,0) and so on
+        supposing the movement is upward, lanes are columns, offsets (0,3,6), (1,4,7) and (2,5,8)
+
+        lanes depend on nothing but shape, dimension and direction
+        so they are generated once and shared by all boards of the same shape via __LANES
         """
-        tile_count=1
-        for dim_length in self.__shape:
-            tile_count=tile_count*dim_length ### figure out how many tiles in total
-        sequential_coordinates=[]
-        for traversal in range(tile_count):
-            sequential_coordinates.append([0 for count in range(len(self.__shape))])
-            ### fill sequential_coordinates with zero at first
-        fraction=tile_count
-        ### for example, shape is (3,3), tile_count is 9
-        ### sequential_coordinates is [[0,0],[0,0],[0,0],[0,0],[0,0],[0,0],[0,0],[0,0],[0,0]]
-        ### move dimension is 1, direction is 1, in short, move right
-        for dim,dim_length in enumerate(self.__shape):
-            fraction=fraction//dim_length
-            ### for the first cycle, fraction is 9/3=3
-            ### and then, fraction is 3/3=1
-            for index_coordinate,coordinate in enumerate(sequential_coordinates):
-                ### since sequential_coordinates is a by-ref list,
-                ### changes to coordinate will be applied to sequential_coordinates itself
-                ### for the first outter cycle, fraction is 3
-                if direction==-1 or dimension!=dim:
-                    ### when the direction is approaching origin (be -1)
-                    ### or current dimension is not the dimension to be moved
-                    ### coordinate of current dimension is filled incrementally from zero
-                    coordinate[dim]=index_coordinate//fraction%dim_length
-                    ### for the first outter cycle
-                    ### coordinate[0]=(0~8)//3%3=0,0,0,1,1,1,2,2,2
-                    ### sequential_coordinates is:
-                    ### [[0,0],[0,0],[0,0],[1,0],[1,0],[1,0],[2,0],[2,0],[2,0]]
-                else:
-                    ### otherwise, it is filled decrementally to zero
-                    coordinate[dim]=dim_length-1-index_coordinate//fraction%dim_length
-                    ### for the second otter cycle
-                    ### coordinate[1]=3-1-(0~8)//1%3=2,1,0,2,1,0,2,1,0
-                    ### sequential_coordinates is:
-                    ### [[0,2],[0,1],[0,0],[1,2],[1,1],[1,0],[2,2],[2,1],[2,0]]
-                    ### everything is in order now
-        return sequential_coordinates
+        key=(self.__shape,dimension,direction)
+        lanes=Board.__LANES.get(key)
+        if lanes is None:
+            dim_length=self.__shape[dimension]
+            stride=self.__strides[dimension]
+            lane_origins=product(*[range(length) if dim!=dimension else (0,) for dim,length in enumerate(self.__shape)])
+            lanes=[]
+            for origin in lane_origins:
+                start=sum([index*dim_stride for index,dim_stride in zip(origin,self.__strides)])
+                if direction==-1:
+                    lanes.append(slice(start,start+dim_length*stride,stride))
+                else: ### a stop of -1 means the end in slice, so None is used to reach offset 0
+                    lanes.append(slice(start+(dim_length-1)*stride,start-1 if start>0 else None,-stride))
+            lanes=tuple(lanes)
+            if len(Board.__LANES)>=64:
+                Board.__LANES.clear() ### board_shape comes from players, keep the cache bounded
+            Board.__LANES[key]=lanes
+        return lanes
+
+    @staticmethod
+    def merge_lane(lane):
+        """
+        slide a lane of exponents toward its beginning in a single pass
+
+        parameters:
+            lane        required, sequence of exponents, 0 means an empty tile
+
+        return:
+            tuple       (list of exponents after sliding, steps, score)
+                        steps is how many tiles have been moved by one tile, summed up
+                        score is the sum of numbers created by merging
+
+        remarks:
+            according to the observed game rules, merging combo is not allowed,
+            for example, movement of 4,4,4,4 to left results 8,8,0,0, not 16,0,0,0
+            so a merged tile is never merged again in the same movement.
+        """
+        merged_lane=[]
+        mergeable=False ### whether the last tile of merged_lane can still be merged
+        steps=0
+        score=0
+        for index,exponent in enumerate(lane):
+            if exponent==0:
+                continue
+            elif mergeable and merged_lane[-1]==exponent:
+                merged_lane[-1]=exponent+1
+                mergeable=False
+                steps=steps+index-len(merged_lane)+1
+                score=score+(2<<exponent)
+            else:
+                steps=steps+index-len(merged_lane)
+                merged_lane.append(exponent)
+                mergeable=True
+        return merged_lane+[0]*(len(lane)-len(merged_lane)),steps,score
+
+    def slide(self,dimension,direction):
+        """
+        the same as move(), but tells how much has been done
+
+        return:
+            tuple       (steps, score), steps is 0 if nothing is moved, see merge_lane()
+        """
+        if type(dimension) is not int or (not 0<=dimension<len(self.__shape)):
+            return 0,0
+        elif direction not in (-1,1):
+            return 0,0
+        cells=self.__cells
+        merge_lane=Board.merge_lane
+        steps=0
+        score=0
+        for lane in self.__generate_lanes(dimension,direction):
+            merged_lane,lane_steps,lane_score=merge_lane(cells[lane])
+            if lane_steps>0:
+                cells[lane]=array("B",merged_lane)
+                steps=steps+lane_steps
+                score=score+lane_score
+        if steps>0:
+            self.__tiles=None
+            self.__movable={}
+        return steps,score
 
     def move(self,dimension,direction):
         """
@@ -279,76 +452,693 @@ class Board():
             boolean     True if at least one tile is moved, otherwise False
 
         remarks:
-            steps is calculated internally but is not exposed by now.
-            according to the observed game rules, merging combo is not allowed,
-            for example, movement of 4,4,4,4 to left results 8,8,0,0, not 16,0,0,0
-            so the blocked_coordinates is introduced.
+            each lane along the dimension is taken out, slid by merge_lane() and written back.
+            steps and score are exposed by slide().
+        """
+        return self.slide(dimension,direction)[0]>0
+
+    def can_move(self,dimension,direction):
+        """
+        tell whether move() would move at least one tile, the board itself is not changed
+
+        a lane can move if a tile has an empty tile or an equal tile next to it toward the edge
         """
         if type(dimension) is not int or (not 0<=dimension<len(self.__shape)):
             return False
         elif direction not in (-1,1):
             return False
-        def move_tile(coordinate,dimension,direction):
-            """
-            recursive function to move a tile until it cannot be moved any more
+        if (dimension,direction) not in self.__movable:
+            cells=self.__cells
+            movable=False
+            for lane in self.__generate_lanes(dimension,direction):
+                line=cells[lane]
+                for index in range(1,len(line)):
+                    if line[index]!=0 and (line[index-1]==0 or line[index-1]==line[index]):
+                        movable=True
+                        break
+                if movable:
+                    break
+            self.__movable[(dimension,direction)]=movable
+        return self.__movable[(dimension,direction)]
 
-            the outmost call of this function is according to sequential_coordinates
-            the inner recursive call is one step each time
-            recursion occurs when the move target is zero, so the further move is expecting
-            """
-            steps=0
-            if coordinate[dimension]==(0 if direction==-1 else self.__shape[dimension]-1):
-                return 0
-            source=self.__get_tile(coordinate)
-            if source==0:
-                return 0
-            target_coordinate=coordinate.copy()
-            target_coordinate[dimension]=target_coordinate[dimension]+direction
-            if target_coordinate in blocked_coordinates:
-                ### blocked_coordinates is defined outside the funcion
-                return 0
-            target=self.__get_tile(target_coordinate)
-            if source==target:
-                self.__set_tile(target_coordinate,target*2)
-                self.__set_tile(coordinate,0)
-                steps=steps+1
-                blocked_coordinates.append(target_coordinate)
-            elif target==0:
-                self.__set_tile(target_coordinate,source)
-                self.__set_tile(coordinate,0)
-                steps=steps+1
-                steps=steps+move_tile(target_coordinate,dimension,direction)
-            return steps
-        sequential_coordinates=self.__generate_sequential_coordinates(dimension,direction)
-        blocked_coordinates=[]
-        steps=0
-        for coordinate in sequential_coordinates:
-            steps=steps+move_tile(coordinate,dimension,direction)
-        return steps>0
+    def legal_moves(self):
+        """
+        list all possible movements without changing the board
 
-    def place(self,location):
+        return:
+            list        [[dimension,direction],*], in order of dimension and then direction -1 before 1
+        """
+        return [[dim,direction] for dim in range(len(self.get_shape())) for direction in (-1,1)\
+                if self.can_move(dim,direction)]
+
+    def get_exponents(self):
+        """bytes, exponents of all tiles in row-major order, 0 for an empty tile"""
+        return bytes(self.__cells)
+
+    def get_key(self):
+        """a compact hashable image of tiles, boards with the same shape and tiles have the same key"""
+        return bytes(self.__cells)
+
+    def get_empty_locations(self):
+        """list of locations (tuples) of all empty tiles in row-major order, where place() can succeed"""
+        shape=self.get_shape()
+        locations=Board.__LOCATIONS.get(shape)
+        if locations is None:
+            locations=tuple(product(*[range(dim_length) for dim_length in shape]))
+            if len(Board.__LOCATIONS)>=64:
+                Board.__LOCATIONS.clear()
+            Board.__LOCATIONS[shape]=locations
+        return [locations[offset] for offset,exponent in enumerate(self.get_exponents()) if exponent==0]
+
+    def place(self,location,number=None):
         """
         place a new number onto a specific tile, the number is 2 or 4 with 10% chance
 
         parameters:
             location    required, list, for example, [1,2] represents tiles[1][2]
+            number      optional, 2 or 4, to place a specific number instead of a random one,
+                        it is meant for robots to look ahead, round never passes it
 
         return:
             boolean     True if the number is placed, otherwise False
         """
-        if len(location)!=len(self.__shape):
+        if len(location)!=len(self.__shape) or number not in (None,2,4):
             return False
         for index in range(len(location)):
             if type(location[index]) is not int:
                 return False
             elif (not 0<=location[index]<self.__shape[index]):
                 return False
-        if self.__get_tile(location)==0:
-            self.__set_tile(location,2 if random.randint(0,9)<9 else 4)
+        offset=sum([index*stride for index,stride in zip(location,self.__strides)])
+        if self.__cells[offset]==0:
+            if number is None:
+                number=2 if random.randint(0,9)<9 else 4
+            self.__cells[offset]=1 if number==2 else 2
+            self.__tiles=None
+            self.__movable={}
+            return True
+        else:
+            return False
+
+class Bit_Board(Board):
+    """
+    an alternative backend of board for the usual 4*4 shape
+
+    key properties:
+        __bits      int, 16 tiles packed as 4-bit exponents, tiles[row][col] is at bit 4*(4*row+col)
+        __wide      bool, True once a tile grows beyond 32768 which 4 bits cannot hold,
+                    from then on every method falls back to Board
+        __movable   dictionary, the same as Board, but for __bits
+
+    remarks:
+        the public contract is exactly the same as Board,
+        Board(...) returns an instance of this class automatically whenever the shape is 4*4.
+        a row is 16 bits, a column becomes a row after transposing the bits,
+        so every movement is four lookups in precomputed tables of 65536 entries,
+        the tables are built once when the first instance is created.
+    """
+    __MOVE_TABLES=None ### (approaching the origin, leaving the origin),
+                       ### each is (moved rows, steps, score) in arrays of 65536 entries
+    __OVERFLOW=0xFFFF ### no row can be 0xFFFF after a movement, so it marks a merge beyond 32768
+    __NUMBERS=tuple([0]+[2**exponent for exponent in range(1,16)])
+
+    @staticmethod
+    def is_applicable(shape,load_tiles):
+        """True if Board(shape,load_tiles=load_tiles) is going to be a 4*4 board"""
+        if type(load_tiles) is list and len(load_tiles)>0:
+            return len(load_tiles)==4 and all(type(row) is list and len(row)==4 and\
+                                              all(type(tile) is int for tile in row) for row in load_tiles)
+        return shape==(4,4)
+
+    @classmethod
+    def __build_move_tables(cls):
+        def reverse(row):
+            return (row&15)<<12|(row>>4&15)<<8|(row>>8&15)<<4|row>>12
+        approaching=(array("H",[0])*65536,array("B",[0])*65536,array("L",[0])*65536)
+        for row in range(65536):
+            cells,steps,score=Board.merge_lane([row&15,row>>4&15,row>>8&15,row>>12])
+            if 16 in cells:
+                approaching[0][row]=cls.__OVERFLOW
+            else:
+                approaching[0][row]=cells[0]|cells[1]<<4|cells[2]<<8|cells[3]<<12
+            approaching[1][row]=steps
+            approaching[2][row]=score
+        leaving=(array("H",[0])*65536,array("B",[0])*65536,array("L",[0])*65536)
+        for row in range(65536):
+            reversed_row=reverse(row)
+            moved_row=approaching[0][reversed_row]
+            leaving[0][row]=moved_row if moved_row==cls.__OVERFLOW else reverse(moved_row)
+            leaving[1][row]=approaching[1][reversed_row]
+            leaving[2][row]=approaching[2][reversed_row]
+        cls.__MOVE_TABLES=(approaching,leaving)
+
+    @staticmethod
+    def __transpose(bits):
+        """swap tiles[row][col] and tiles[col][row] with a few masks"""
+        bits=bits&0xF0F00F0FF0F00F0F|(bits&0x0000F0F00000F0F0)<<12|(bits&0x0F0F00000F0F0000)>>12
+        return bits&0xFF00FF0000FF00FF|(bits&0x00FF00FF00000000)>>24|(bits&0x00000000FF00FF00)<<24
+
+    def __init__(self,shape=(4,4),*,load_tiles=[]):
+        super().__init__(shape,load_tiles=load_tiles) ### validation is the same as Board
+        self.__pack(super().get_tiles())
+
+    def __pack(self,tiles):
+        """load 4*4 tiles into __bits"""
+        if Bit_Board.__MOVE_TABLES is None:
+            Bit_Board.__build_move_tables()
+        self.__bits=0
+        self.__wide=False
+        self.__movable={}
+        for index,tile in enumerate([tile for row in tiles for tile in row]):
+            if tile>32768:
+                self.__wide=True
+                break
+            elif tile>0:
+                self.__bits=self.__bits|(tile.bit_length()-1)<<4*index
+
+    @classmethod
+    def from_trusted(cls,tiles):
+        board=super().from_trusted(tiles)
+        board.__pack(tiles)
+        return board
+
+    def clone(self):
+        board=super().clone()
+        board.__bits=self.__bits
+        board.__wide=self.__wide
+        board.__movable=self.__movable.copy()
+        return board
+
+    def __widen(self):
+        """load the current tiles into Board and let Board take over from now on"""
+        super().__init__(load_tiles=self.get_tiles())
+        self.__wide=True
+
+    def get_tiles(self):
+        if self.__wide:
+            return super().get_tiles()
+        bits=self.__bits
+        numbers=Bit_Board.__NUMBERS
+        return [[numbers[bits>>shift&15] for shift in range(row_shift,row_shift+16,4)] for row_shift in (0,16,32,48)]
+
+    def slide(self,dimension,direction):
+        if self.__wide:
+            return super().slide(dimension,direction)
+        if type(dimension) is not int or (not 0<=dimension<2):
+            return 0,0
+        elif direction not in (-1,1):
+            return 0,0
+        moved_rows,rows_steps,rows_score=Bit_Board.__MOVE_TABLES[0 if direction==-1 else 1]
+        bits=self.__bits if dimension==1 else Bit_Board.__transpose(self.__bits)
+        moved_bits=0
+        steps=0
+        score=0
+        for shift in (0,16,32,48):
+            row=bits>>shift&0xFFFF
+            moved_row=moved_rows[row]
+            if moved_row==Bit_Board.__OVERFLOW:
+                self.__widen()
+                return super().slide(dimension,direction)
+            moved_bits=moved_bits|moved_row<<shift
+            steps=steps+rows_steps[row]
+            score=score+rows_score[row]
+        if steps==0:
+            return 0,0
+        self.__bits=moved_bits if dimension==1 else Bit_Board.__transpose(moved_bits)
+        self.__movable={}
+        return steps,score
+
+    def can_move(self,dimension,direction):
+        if self.__wide:
+            return super().can_move(dimension,direction)
+        if type(dimension) is not int or (not 0<=dimension<2):
+            return False
+        elif direction not in (-1,1):
+            return False
+        if (dimension,direction) not in self.__movable:
+            moved_rows=Bit_Board.__MOVE_TABLES[0 if direction==-1 else 1][0]
+            bits=self.__bits if dimension==1 else Bit_Board.__transpose(self.__bits)
+            self.__movable[(dimension,direction)]=any([moved_rows[bits>>shift&0xFFFF]!=bits>>shift&0xFFFF\
+                                                       for shift in (0,16,32,48)])
+        return self.__movable[(dimension,direction)]
+
+    def get_exponents(self):
+        if self.__wide:
+            return super().get_exponents()
+        bits=self.__bits
+        return bytes([bits>>shift&15 for shift in range(0,64,4)])
+
+    def get_key(self):
+        if self.__wide:
+            return super().get_key()
+        return self.__bits
+
+    def place(self,location,number=None):
+        if self.__wide:
+            return super().place(location,number)
+        if len(location)!=2 or number not in (None,2,4):
+            return False
+        for index in range(len(location)):
+            if type(location[index]) is not int:
+                return False
+            elif (not 0<=location[index]<4):
+                return False
+        shift=4*(4*location[0]+location[1])
+        if self.__bits>>shift&15==0:
+            if number is None:
+                number=2 if random.randint(0,9)<9 else 4
+            self.__bits=self.__bits|(1 if number==2 else 2)<<shift
+            self.__movable={}
             return True
         else:
             return False
 
+class Board_Batch():
+    """
+    many boards of the same shape held in one NumPy array, to move and place on all of them at once
+
+    key properties:
+        __shape     tuple, shape of each board, the same rule as Board
+        __cells     numpy array of uint8, exponents of tiles, indexed by [board]+location
+
+    key methods:
+        __init__()  to initialize count empty boards, NumPy must be installed
+        get_board() Board, a copy of one of the boards
+        load_board() None, copy a Board into one of the boards
+        slide()     tuple, move the same way on selected boards, returns which boards moved and scores
+        place()     numpy array, place a number onto a random empty tile of selected boards
+        legal_moves() numpy array, whether each board can move in each way, without changing boards
+
+    remarks:
+        it obeys the same rules as Board, merging combo is not allowed.
+        a movement is a loop over the length of one dimension, every step works on all lanes of all boards.
+        every method that takes mask works on boards where mask is True only, or on all boards if mask is None.
+    """
+    def __init__(self,count,shape=(4,4),*,seed=None):
+        if numpy is None:
+            raise Exception("NumPy is not installed")
+        self.__shape=tuple(Board(shape).get_shape()) ### validation is the same as Board
+        self.__cells=numpy.zeros((count,)+self.__shape,dtype=numpy.uint8)
+        self.__random=numpy.random.default_rng(seed)
+
+    def get_count(self):
+        return self.__cells.shape[0]
+
+    def get_shape(self):
+        return self.__shape
+
+    def get_exponents(self):
+        """numpy array of uint8, a read-only view of exponents, indexed by [board]+location"""
+        cells=self.__cells.view()
+        cells.flags.writeable=False
+        return cells
+
+    def get_board(self,index):
+        numbers=[0 if exponent==0 else 2**int(exponent) for exponent in self.__cells[index].ravel()]
+        tiles=numbers
+        for dim_length in reversed(self.__shape[1:]):
+            tiles=[tiles[offset:offset+dim_length] for offset in range(0,len(tiles),dim_length)]
+        return Board.from_trusted(tiles)
+
+    def load_board(self,index,board):
+        """copy tiles of a Board of the same shape into one of the boards"""
+        if board.get_shape()!=self.__shape:
+            raise Exception("Shape of board does not match")
+        self.__cells[index]=numpy.frombuffer(board.get_exponents(),dtype=numpy.uint8).reshape(self.__shape)
+
+    def __lanes(self,dimension,direction):
+        """lanes of all boards as rows of a new 2d array, each begins at the edge to move to"""
+        lanes=numpy.moveaxis(self.__cells,dimension+1,-1)
+        if direction==1:
+            lanes=lanes[...,::-1]
+        return lanes.reshape(-1,self.__shape[dimension])
+
+    def slide(self,dimension,direction,mask=None):
+        """
+        parameters:
+            dimension   required, int, the same as Board.move()
+            direction   required, -1 or 1, the same as Board.move()
+            mask        optional, numpy array of bool, which boards to move
+
+        return:
+            tuple       (numpy array of bool, which boards are moved,
+                         numpy array of int64, score of each board, see Board.merge_lane())
+        """
+        count=self.get_count()
+        if type(dimension) is not int or (not 0<=dimension<len(self.__shape)) or direction not in (-1,1):
+            return numpy.zeros(count,dtype=bool),numpy.zeros(count,dtype=numpy.int64)
+        lanes=self.__lanes(dimension,direction)
+        dim_length=lanes.shape[1]
+        ### compact each lane with a stable sort which puts empty tiles behind
+        merged=numpy.take_along_axis(lanes,numpy.argsort(lanes==0,axis=1,kind="stable"),axis=1)
+        scores=numpy.zeros(lanes.shape[0],dtype=numpy.int64)
+        for index in range(dim_length-1):
+            merging=(merged[:,index]!=0)&(merged[:,index]==merged[:,index+1])
+            if merging.any():
+                merged[merging,index]=merged[merging,index]+1
+                scores[merging]=scores[merging]+numpy.left_shift(1,merged[merging,index].astype(numpy.int64))
+                ### the rest of the lane closes up, the merged tile is never compared again
+                merged[merging,index+1:dim_length-1]=merged[merging,index+2:]
+                merged[merging,dim_length-1]=0
+        moved=(merged!=lanes).reshape(count,-1).any(axis=1)
+        scores=scores.reshape(count,-1).sum(axis=1)
+        if mask is not None:
+            moved=moved&mask
+            scores=numpy.where(mask,scores,0)
+        if direction==1:
+            merged=merged[:,::-1]
+        merged=merged.reshape(numpy.moveaxis(self.__cells,dimension+1,-1).shape)
+        merged=numpy.moveaxis(merged,-1,dimension+1)
+        self.__cells[moved]=merged[moved]
+        return moved,scores
+
+    def move(self,dimension,direction,mask=None):
+        """numpy array of bool, which boards are moved, see slide()"""
+        return self.slide(dimension,direction,mask)[0]
+
+    def place(self,mask=None):
+        """
+        place 2 or 4 with 10% chance onto a random empty tile of each board, as Random_Attacker does
+
+        return:
+            numpy array of bool, which boards are placed, a board without any empty tile is not
+        """
+        count=self.get_count()
+        flat_cells=self.__cells.reshape(count,-1)
+        keys=self.__random.random(flat_cells.shape)
+        keys[flat_cells!=0]=-1
+        offsets=keys.argmax(axis=1)
+        placed=keys[numpy.arange(count),offsets]>=0
+        if mask is not None:
+            placed=placed&mask
+        exponents=numpy.where(self.__random.random(count)<0.9,1,2).astype(numpy.uint8)
+        flat_cells[placed,offsets[placed]]=exponents[placed]
+        return placed
+
+    def legal_moves(self):
+        """
+        numpy array of bool, indexed by [board,move], moves are in the same order as Board.legal_moves(),
+        which is [0,-1],[0,1],[1,-1],[1,1] and so on
+        """
+        count=self.get_count()
+        masks=numpy.zeros((count,2*len(self.__shape)),dtype=bool)
+        for dim in range(len(self.__shape)):
+            for index,direction in enumerate((-1,1)):
+                lanes=self.__lanes(dim,direction)
+                movable=(lanes[:,1:]!=0)&((lanes[:,:-1]==0)|(lanes[:,:-1]==lanes[:,1:]))
+                masks[:,2*dim+index]=movable.reshape(count,-1).any(axis=1)
+        return masks
+
+
+class Game_Record():
+    """
+    a compact binary record of a round, enough to rebuild every position of it through Board
+
+    key properties:
+        __shape         tuple, shape of the board
+        __exponents     bytes, exponents of the initial tiles in row-major order, the same as Board.get_exponents()
+        __plies         array, 2 bytes for each executed instruction in order of play:
+                            placement   offset<<1|(1 if number is 4 else 0), offset is the row-major index of the location
+                            move        0x8000|dimension<<1|(1 if direction is 1 else 0)
+        __round_score   int, -1 until finish()
+        __interval      int, a keyframe is taken every __interval plies, KEYFRAME_INTERVAL by default
+        __keyframes     list, exponents of tiles as Board.get_exponents() after every __interval plies,
+                        so __keyframes[index] is the position after (index+1)*__interval plies
+
+    key methods:
+        add_placement() None, record a placement which attacker has executed on board
+        add_move()      None, record a move which defender has executed on board
+        finish()        None, record the score when the round ends
+        get_shape()     tuple
+        get_ply_count() int, how many instructions are recorded
+        get_round_score() int, -1 if the round has not ended
+        to_bytes()      bytes, the record in binary format, all integers are little-endian:
+                            version(1) dimensions(1) shape(1 each) initial exponents(1 each)
+                            interval(2) ply_count(4) plies(2 each) keyframes(1 for each tile of each keyframe)
+                            round_score(8, signed)
+        from_bytes()    Game_Record, load a record from to_bytes()
+        load_log()      dictionary, {round_uuid:Game_Record,*} of ended rounds in a log file
+        replay()        Board, the position after some plies, all of them by default,
+                        it starts from the nearest keyframe, so it applies less than __interval plies
+
+    remarks:
+        a placement always fits in 15 bits, because a board has 10**4 tiles at most, see Board.__init__().
+        plies and keyframes are in fixed size, so the offset of any of them in to_bytes() is known by its index,
+        no offset table is stored.
+        a 4*4 round of a few hundred moves takes a few hundred bytes to a few KB,
+        while its log lines take tens of KB with board_tiles dumped at every step.
+    """
+    VERSION=2
+    KEYFRAME_INTERVAL=64
+
+    def __init__(self,shape,exponents,*,interval=KEYFRAME_INTERVAL):
+        self.__shape=tuple(shape)
+        self.__exponents=bytes(exponents)
+        self.__plies=array("H")
+        self.__round_score=-1
+        self.__interval=interval
+        self.__keyframes=[]
+
+    def __offset(self,location):
+        offset=0
+        for index,dim_length in zip(location,self.__shape):
+            offset=offset*dim_length+index
+        return offset
+
+    def __location(self,offset):
+        location=[]
+        for dim_length in reversed(self.__shape):
+            offset,index=divmod(offset,dim_length)
+            location.insert(0,index)
+        return location
+
+    def __add(self,code,exponents):
+        self.__plies.append(code)
+        if len(self.__plies)%self.__interval==0:
+            self.__keyframes.append(exponents)
+
+    def add_placement(self,location,board):
+        """the number is read from board, so call it after board.place(location) succeeds"""
+        offset=self.__offset(location)
+        exponents=board.get_exponents()
+        self.__add(offset<<1|(1 if exponents[offset]==2 else 0),exponents)
+
+    def add_move(self,dimension,direction,board):
+        """call it after board.move(dimension,direction) succeeds"""
+        self.__add(0x8000|dimension<<1|(1 if direction==1 else 0),board.get_exponents())
+
+    def finish(self,round_score):
+        self.__round_score=round_score
+
+    def get_shape(self):
+        return self.__shape
+
+    def get_ply_count(self):
+        return len(self.__plies)
+
+    def get_round_score(self):
+        return self.__round_score
+
+    def to_bytes(self):
+        plies=array("H",self.__plies)
+        if sys.byteorder!="little":
+            plies.byteswap()
+        return bytes([Game_Record.VERSION,len(self.__shape)])+bytes(self.__shape)+self.__exponents\
+               +self.__interval.to_bytes(2,"little")+len(plies).to_bytes(4,"little")+plies.tobytes()\
+               +b"".join(self.__keyframes)+self.__round_score.to_bytes(8,"little",signed=True)
+
+    @classmethod
+    def from_bytes(cls,data):
+        try:
+            if data[0]!=Game_Record.VERSION:
+                raise Exception("Version "+str(data[0])+" is not supported")
+            shape=tuple(data[2:2+data[1]])
+            tile_count=1
+            for dim_length in shape:
+                tile_count=tile_count*dim_length
+            position=2+len(shape)+tile_count
+            interval=int.from_bytes(data[position:position+2],"little")
+            ply_count=int.from_bytes(data[position+2:position+6],"little")
+            position=position+6
+            if interval==0 or len(data)!=position+2*ply_count+ply_count//interval*tile_count+8:
+                raise Exception("Length does not match")
+            record=cls(shape,data[2+len(shape):2+len(shape)+tile_count],interval=interval)
+            record.__plies.frombytes(data[position:position+2*ply_count])
+            if sys.byteorder!="little":
+                record.__plies.byteswap()
+            position=position+2*ply_count
+            for index in range(ply_count//interval):
+                record.__keyframes.append(bytes(data[position:position+tile_count]))
+                position=position+tile_count
+            record.__round_score=int.from_bytes(data[position:],"little",signed=True)
+        except Exception as err:
+            raise Exception("Game record is not properly formatted: "+str(err))
+        return record
+
+    @classmethod
+    def load_log(cls,log_file_name):
+        """records are found in the log_details of "Round ended" messages, see Round.play()"""
+        records={}
+        with open(log_file_name) as log_file:
+            for log_line in log_file:
+                if '"Round ended"' not in log_line:
+                    continue
+                message=json.loads(log_line)
+                if message["log_message"]=="Round ended" and "game_record" in message["log_details"]:
+                    records[message["log_round_uuid"]]=cls.from_bytes(b64decode(message["log_details"]["game_record"]))
+        return records
+
+    def replay(self,ply=None):
+        """
+        parameters:
+            ply         optional, int, how many plies to apply on the initial tiles, all of them if omitted
+
+        return:
+            Board       a new board at that position, the same as the round had
+        """
+        if ply is None:
+            ply=len(self.__plies)
+        elif type(ply) is not int or not 0<=ply<=len(self.__plies):
+            raise Exception("Ply is out of range")
+        keyframe=ply//self.__interval
+        exponents=self.__exponents if keyframe==0 else self.__keyframes[keyframe-1]
+        numbers=[0 if exponent==0 else 2**exponent for exponent in exponents]
+        for dim_length in reversed(self.__shape[1:]): ### group from inside out as Board.get_tiles()
+            numbers=[numbers[index:index+dim_length] for index in range(0,len(numbers),dim_length)]
+        board=Board.from_trusted(numbers)
+        for code in self.__plies[keyframe*self.__interval:ply]:
+            if code&0x8000:
+                applied=board.move(code>>1&0x3fff,1 if code&1 else -1)
+            else:
+                applied=board.place(self.__location(code>>1),4 if code&1 else 2)
+            if not applied:
+                raise Exception("Game record does not match the board")
+        return board
+
+
+class Game_Archive():
+    """
+    archive of ended rounds in two append-only files, for offline tools to scan without parsing logs
+
+    key properties:
+        __ENTRY         struct.Struct, an entry of a round in INDEX_FILE, 80 bytes little-endian:
+                            uuid(16) shape(4, 0 for unused dimensions) attacker_type(12) defender_type(12)
+                            ended_at(8, float, seconds since epoch) round_score(8) max_exponent(1) padding(3)
+                            moves(4) record_offset(8) record_length(4)
+        __LOCK          threading.Lock, appends from several threads are written one after another
+        INDEX_FILE      str, path of the file of entries in fixed size
+        RECORD_FILE     str, path of the file of Game_Record.to_bytes() of the rounds one after another,
+                        record_offset and record_length of an entry point into it
+
+    key methods:
+        append()        None, archive a round which has ended
+        scan()          generator, tuples of entries in the order of __ENTRY, unpacked from a memory map of INDEX_FILE
+        to_dictionary() dictionary, readable fields of an entry from scan()
+        get_record()    Game_Record, of an entry from scan(), read from a memory map of RECORD_FILE
+        summarize()     dictionary, a leaderboard, and Simulator.summarize() for each pair of player types
+
+    remarks:
+        archive class is not allowed to initialize an instance.
+        a record is written before its entry, so an entry never points to an incomplete record,
+        and an incomplete entry at the end of INDEX_FILE is ignored.
+    """
+    __ENTRY=struct.Struct("<16s4s12s12sdqB3xIQI")
+    __LOCK=threading.Lock()
+    INDEX_FILE=sys.path[0]+"/archive/games.idx"
+    RECORD_FILE=sys.path[0]+"/archive/games.dat"
+
+    def __init__(self):
+        raise Exception("Game_Archive class is not allowed to initialize")
+
+    @classmethod
+    def append(cls,round):
+        """it blocks on file writing, so call it in a thread from the event loop"""
+        record=round.get_record()
+        summary=round.get_summary()
+        if record is None or summary is None:
+            raise Exception("Round has not ended")
+        record_bytes=record.to_bytes()
+        with cls.__LOCK:
+            os.makedirs(os.path.dirname(cls.INDEX_FILE),exist_ok=True)
+            os.makedirs(os.path.dirname(cls.RECORD_FILE),exist_ok=True)
+            with open(cls.RECORD_FILE,"ab") as record_file:
+                record_offset=record_file.tell()
+                record_file.write(record_bytes)
+            with open(cls.INDEX_FILE,"ab") as index_file:
+                index_file.truncate(index_file.tell()//cls.__ENTRY.size*cls.__ENTRY.size) ### drop an incomplete entry left by a crash
+                index_file.write(cls.__ENTRY.pack(UUID(round.get_uuid()).bytes,\
+                                                  bytes(record.get_shape()),\
+                                                  round.get_attacker_type().encode(),\
+                                                  round.get_defender_type().encode(),\
+                                                  datetime.now().timestamp(),\
+                                                  summary["round_score"],\
+                                                  summary["max_tile"].bit_length()-1 if summary["max_tile"]>0 else 0,\
+                                                  summary["moves"],\
+                                                  record_offset,\
+                                                  len(record_bytes)))
+
+    @classmethod
+    def scan(cls):
+        """
+        entries are unpacked one by one from the memory map, the file is never read as a whole,
+        fields are bytes as packed, see to_dictionary() to decode them
+        """
+        if not os.path.exists(cls.INDEX_FILE) or os.path.getsize(cls.INDEX_FILE)<cls.__ENTRY.size:
+            return
+        with open(cls.INDEX_FILE,"rb") as index_file,\
+             mmap.mmap(index_file.fileno(),0,access=mmap.ACCESS_READ) as index_map,\
+             memoryview(index_map)[:len(index_map)//cls.__ENTRY.size*cls.__ENTRY.size] as entries:
+            yield from cls.__ENTRY.iter_unpack(entries)
+
+    @staticmethod
+    def to_dictionary(entry):
+        uuid,shape,attacker_type,defender_type,ended_at,round_score,max_exponent,moves,record_offset,record_length=entry
+        return {"uuid":str(UUID(bytes=uuid)),\
+                "board_shape":[dim_length for dim_length in shape if dim_length>0],\
+                "attacker_type":attacker_type.rstrip(b"\x00").decode(),\
+                "defender_type":defender_type.rstrip(b"\x00").decode(),\
+                "ended_at":str(datetime.fromtimestamp(ended_at)),\
+                "round_score":round_score,\
+                "max_tile":2**max_exponent if max_exponent>0 else 0,\
+                "moves":moves}
+
+    @classmethod
+    def get_record(cls,entry):
+        record_offset,record_length=entry[-2:]
+        with open(cls.RECORD_FILE,"rb") as record_file,\
+             mmap.mmap(record_file.fileno(),0,access=mmap.ACCESS_READ) as record_map:
+            return Game_Record.from_bytes(record_map[record_offset:record_offset+record_length])
+
+    @classmethod
+    def summarize(cls,top=10):
+        """
+        parameters:
+            top             optional, int, how many rounds with the highest scores are on the leaderboard
+
+        return:
+            dictionary      games, leaderboard as a list of to_dictionary() of the top rounds,
+                            players as {"<attacker_type>/<defender_type>":Simulator.summarize() without seconds,*}
+        """
+        games=0
+        leaderboard=[]
+        summaries={}
+        for entry in cls.scan():
+            games=games+1
+            players=entry[2].rstrip(b"\x00").decode()+"/"+entry[3].rstrip(b"\x00").decode()
+            summaries.setdefault(players,[]).append({"round_score":entry[5],"moves":entry[7],\
+                                                     "max_tile":2**entry[6] if entry[6]>0 else 0})
+            if len(leaderboard)<top:
+                heapq.heappush(leaderboard,(entry[5],-games,entry)) ### the earlier one wins a tie
+            elif top>0 and entry[5]>leaderboard[0][0]:
+                heapq.heapreplace(leaderboard,(entry[5],-games,entry))
+        statistics={"games":games,\
+                    "leaderboard":[cls.to_dictionary(entry) for score,index,entry in sorted(leaderboard,reverse=True)],\
+                    "players":{}}
+        for players,player_summaries in sorted(summaries.items()):
+            statistics["players"][players]=Simulator.summarize(player_summaries,0)
+            del statistics["players"][players]["seconds"],statistics["players"][players]["games_per_second"]
+        return statistics
+
 
 class Base_Attacker():
     """
@@ -359,6 +1149,7 @@ class Base_Attacker():
     the base attacker class:
         gets a uuid from the round instance, online attacker uses it
         exposes get_place_instruction() to call think() which implemented in child class
+        exposes get_place_instruction_async() to await think_async(), which calls think() in an executor by default
     so that any child class only cares about think() method, for simplicity
     """
     def __init__(self,round_uuid):
@@ -367,8 +1158,13 @@ class Base_Attacker():
         return self.uuid
     def think(self,tiles):
         return {"keepgoing":False,"location":None}
+    async def think_async(self,tiles):
+        return await asyncio.get_running_loop().run_in_executor(None,self.think,tiles)
     def get_place_instruction(self,tiles):
-        place_instruction=self.think(tiles)
+        return self.__check_place_instruction(self.think(tiles))
+    async def get_place_instruction_async(self,tiles):
+        return self.__check_place_instruction(await self.think_async(tiles))
+    def __check_place_instruction(self,place_instruction):
         if type(place_instruction) is not dict:
             raise Exception("place_instruction is not a dictionary")
         elif len(place_instruction)!=2:
@@ -447,25 +1243,27 @@ class Online_Attacker(Base_Attacker):
     """
     online attacker works with Server.ONLINE_ROUNDS
 
-    parameter tiles in think() is useless
+    it only thinks asynchronously in Round.start_async(), which runs in the event loop of Server
     it works like this:
         Server class listens to HTTP request and store them into Server.ONLINE_ROUNDS
         online attacker interacts with Server.ONLINE_ROUNDS
-            when the timing is right, it sends out a signal (attacker_wait=true) and waits for instruction
-            new proper HTTP request provides an instruction and shuts down the wait signal
-            online attacker stops waiting and returns the instruction
+            when the timing is right, it sends out a signal (attacker_wait=true) and awaits an instruction future
+            new proper HTTP request provides an instruction, shuts down the wait signal and resolves the future
+            online attacker wakes up and returns the instruction
         timing is managed by round instance
     """
     def think(self,tiles):
+        sys.exit("online attacker can only think asynchronously")
+    async def think_async(self,tiles):
         round_uuid=self.get_round_uuid()
         if round_uuid not in Server.ONLINE_ROUNDS:
             sys.exit("round_uuid is not in Server.ONLINE_ROUNDS")
-        Server.ONLINE_ROUNDS[round_uuid]["board_tiles"]=tiles
-        Server.ONLINE_ROUNDS[round_uuid]["attacker_wait"]=True
-        while Server.ONLINE_ROUNDS[round_uuid]["attacker_wait"]:
-            sleep(0.1)
-        Server.ONLINE_ROUNDS[round_uuid]["last_update"]=datetime.now()
-        return Server.ONLINE_ROUNDS[round_uuid]["attacker_instruction"]
+        instruction_future=asyncio.get_running_loop().create_future()
+        Server.ONLINE_ROUNDS.update(round_uuid,instruction_future=instruction_future,attacker_wait=True)
+        Server.notify_watchers(round_uuid,tiles)
+        await instruction_future
+        Server.ONLINE_ROUNDS.update(round_uuid,last_update=monotonic())
+        return Server.ONLINE_ROUNDS.snapshot(round_uuid,"attacker_instruction").attacker_instruction
 
 class Strategy_Attacker(Base_Attacker):
     """
@@ -509,6 +1307,152 @@ class Strategy_Attacker(Base_Attacker):
         else:
             return {"keepgoing":False,"location":None}
 
+class Minimax_Attacker(Base_Attacker):
+    """
+    it searches placements against replies of the defender with alpha-beta pruning
+
+    key properties:
+        TIME_BUDGET     float, seconds to think for each placement, adjustable for all minimax attackers
+        CACHE_SIZE      int, the evaluation cache is cleared once it holds more entries than this
+        CANDIDATES      int, at most so many placements are searched at each turn, the most harmful ones
+        SAMPLE_SIZE     int, at most so many empty locations are evaluated to find CANDIDATES, a random sample of them
+        __evaluations   dictionary, {board_key:value}, Search_Defender.evaluate() of boards seen in the round
+
+    remarks:
+        the attacker chooses where to place, but not the number,
+        it searches as if 2 is always placed, which happens 9 times out of 10.
+        only empty locations next to a tile are considered, which are where a placement gets in the way,
+        and a random sample of SAMPLE_SIZE of them on a large board, so each turn costs about the same on any shape.
+        search deepens iteratively from depth 0 (judge the board right after each placement),
+        depth 0 stops at TIME_BUDGET as well, with the placements evaluated so far,
+        the best placement of the deepest search finished within TIME_BUDGET is taken,
+        each depth searches placements in the order of the results of the previous depth.
+        the attacker wins when the defender cannot move, such a board is valued far below any other.
+    """
+    TIME_BUDGET=0.04
+    CACHE_SIZE=200000
+    CANDIDATES=8
+    SAMPLE_SIZE=24
+
+    class __Time_Is_Up(Exception):
+        pass
+
+    def __init__(self,round_uuid):
+        super().__init__(round_uuid)
+        self.__evaluations={}
+        self.__deadline=0
+
+    def __evaluate(self,board):
+        key=board.get_key()
+        if key not in self.__evaluations:
+            if len(self.__evaluations)>=Minimax_Attacker.CACHE_SIZE:
+                self.__evaluations.clear()
+            self.__evaluations[key]=Search_Defender.evaluate(board)
+        return self.__evaluations[key]
+
+    def __locations(self,board):
+        """empty locations next to a tile, or all empty locations of a board without any tile, SAMPLE_SIZE at most"""
+        shape=board.get_shape()
+        exponents=board.get_exponents()
+        strides=[]
+        stride=1
+        for dim_length in reversed(shape): ### row-major as Board.get_exponents()
+            strides.insert(0,stride)
+            stride=stride*dim_length
+        offsets=set()
+        for offset,exponent in enumerate(exponents):
+            if exponent==0:
+                continue
+            for dim_length,stride in zip(shape,strides):
+                index=offset//stride%dim_length
+                if index>0 and exponents[offset-stride]==0:
+                    offsets.add(offset-stride)
+                if index<dim_length-1 and exponents[offset+stride]==0:
+                    offsets.add(offset+stride)
+        if len(offsets)==0:
+            offsets=[offset for offset,exponent in enumerate(exponents) if exponent==0]
+        offsets=sorted(offsets)
+        if len(offsets)>Minimax_Attacker.SAMPLE_SIZE:
+            offsets=sorted(random.sample(offsets,Minimax_Attacker.SAMPLE_SIZE))
+        return [[offset//stride%dim_length for dim_length,stride in zip(shape,strides)] for offset in offsets]
+
+    def __placements(self,board,*,partial=False):
+        """
+        [(value,location,board_after_placement),*], the most harmful CANDIDATES placements first
+
+        it raises __Time_Is_Up after TIME_BUDGET, unless partial is True and at least one placement is evaluated,
+        then the placements evaluated so far are returned
+        """
+        placements=[]
+        for location in self.__locations(board):
+            if monotonic()>self.__deadline:
+                if partial and len(placements)>0:
+                    break
+                raise Minimax_Attacker.__Time_Is_Up()
+            next_board=board.clone()
+            next_board.place(location,2)
+            placements.append((self.__evaluate(next_board),location,next_board))
+        placements.sort(key=lambda placement:placement[0])
+        return placements[:Minimax_Attacker.CANDIDATES]
+
+    def __attack(self,board,depth,alpha,beta):
+        """value of a board which the attacker is about to place onto"""
+        if depth==0:
+            return self.__evaluate(board)
+        if monotonic()>self.__deadline:
+            raise Minimax_Attacker.__Time_Is_Up()
+        placements=self.__placements(board)
+        if len(placements)==0:
+            return self.__evaluate(board)
+        value=None
+        for placement in placements:
+            placement_value=self.__defend(placement[2],depth,alpha,beta)
+            if value is None or placement_value<value:
+                value=placement_value
+            if value<=alpha:
+                break
+            beta=min(beta,value)
+        return value
+
+    def __defend(self,board,depth,alpha,beta):
+        """value of a board which the defender is about to move"""
+        value=None
+        for dim,direction in board.legal_moves():
+            next_board=board.clone()
+            next_board.move(dim,direction)
+            move_value=self.__attack(next_board,depth-1,alpha,beta)
+            if value is None or move_value>value:
+                value=move_value
+            if value>=beta:
+                break
+            alpha=max(alpha,value)
+        if value is None: ### the defender cannot move any more
+            return self.__evaluate(board)-100000
+        return value
+
+    def think(self,tiles):
+        board=Board.from_trusted(tiles)
+        self.__deadline=monotonic()+Minimax_Attacker.TIME_BUDGET
+        placements=self.__placements(board,partial=True) ### depth 0 returns what it has evaluated in time
+        if len(placements)==0:
+            return {"keepgoing":False,"location":None}
+        depth=1
+        while monotonic()<self.__deadline:
+            alpha=float("-inf")
+            beta=float("inf")
+            searched=[]
+            try:
+                for placement in placements:
+                    value=self.__defend(placement[2],depth,alpha,beta)
+                    searched.append((value,)+placement[1:])
+                    beta=min(beta,value)
+            except Minimax_Attacker.__Time_Is_Up:
+                break
+            ### placements which were cut off are only known to be no better than beta, keep their order
+            placements=sorted(searched,key=lambda placement:placement[0])
+            depth=depth+1
+        return {"keepgoing":True,"location":list(placements[0][1])}
+
 
 class Base_Defender():
     """
@@ -519,6 +1463,7 @@ class Base_Defender():
     the base defender class:
         gets a uuid from the round instance, online defender uses it
         exposes get_move_instruction() to call think() which implemented in child class
+        exposes get_move_instruction_async() to await think_async(), which calls think() in an executor by default
     so that any child class only cares about think() method, for simplicity
     """
     def __init__(self,round_uuid): ### uuid is set in round.start() when initialize an defender
@@ -527,8 +1472,13 @@ class Base_Defender():
         return self.uuid
     def think(self,tiles):
         return {"keepgoing":False,"dimension":None,"direction":None}
+    async def think_async(self,tiles):
+        return await asyncio.get_running_loop().run_in_executor(None,self.think,tiles)
     def get_move_instruction(self,tiles):
-        move_instruction=self.think(tiles)
+        return self.__check_move_instruction(self.think(tiles))
+    async def get_move_instruction_async(self,tiles):
+        return self.__check_move_instruction(await self.think_async(tiles))
+    def __check_move_instruction(self,move_instruction):
         if type(move_instruction) is not dict:
             raise Exception("move_instruction is not a dictionary")
         elif len(move_instruction)!=3:
@@ -549,16 +1499,7 @@ class Random_Defender(Base_Defender):
     find out all possible movements and return one randomly
     """
     def think(self,tiles):
-        def recursive_dims(tiles,dims=0):
-            if type(tiles) is list:
-                dims=dims+1
-                dims=recursive_dims(tiles[0],dims)
-            return dims
-        dims=recursive_dims(tiles)
-        possible_moves=[]
-        for dim in range(dims):
-            if (Board(load_tiles=tiles)).move(dim,-1):possible_moves.append([dim,-1])
-            if (Board(load_tiles=tiles)).move(dim,1):possible_moves.append([dim,1])
+        possible_moves=Board.from_trusted(tiles).legal_moves()
         if len(possible_moves)>0:
             decided_move=random.choice(possible_moves)
             return {"keepgoing":True,"dimension":decided_move[0],"direction":decided_move[1]}
@@ -607,46 +1548,168 @@ class Online_Defender(Base_Defender):
     """
     online defender works with Server.ONLINE_ROUNDS
 
-    parameter tiles in think() is useless
+    it only thinks asynchronously in Round.start_async(), which runs in the event loop of Server
     it works like this:
         Server class listens to HTTP request and store them into Server.ONLINE_ROUNDS
         online defender interacts with Server.ONLINE_ROUNDS
-            when the timing is right, it sends out a signal (defender_wait=true) and waits for instruction
-            new proper HTTP request provides an instruction and shuts down the wait signal
-            online defender stops waiting and returns the instruction
+            when the timing is right, it sends out a signal (defender_wait=true) and awaits an instruction future
+            new proper HTTP request provides an instruction, shuts down the wait signal and resolves the future
+            online defender wakes up and returns the instruction
         timing is managed by round instance
     """
     def think(self,tiles):
+        sys.exit("online defender can only think asynchronously")
+    async def think_async(self,tiles):
         round_uuid=self.get_round_uuid()
         if round_uuid not in Server.ONLINE_ROUNDS:
             sys.exit("round_uuid is not in Server.ONLINE_ROUNDS")
-        Server.ONLINE_ROUNDS[round_uuid]["board_tiles"]=tiles
-        Server.ONLINE_ROUNDS[round_uuid]["defender_wait"]=True
-        while Server.ONLINE_ROUNDS[round_uuid]["defender_wait"]:
-            sleep(0.1)
-        Server.ONLINE_ROUNDS[round_uuid]["last_update"]=datetime.now()
-        return Server.ONLINE_ROUNDS[round_uuid]["defender_instruction"]
+        instruction_future=asyncio.get_running_loop().create_future()
+        Server.ONLINE_ROUNDS.update(round_uuid,instruction_future=instruction_future,defender_wait=True)
+        Server.notify_watchers(round_uuid,tiles)
+        await instruction_future
+        Server.ONLINE_ROUNDS.update(round_uuid,last_update=monotonic())
+        return Server.ONLINE_ROUNDS.snapshot(round_uuid,"defender_instruction").defender_instruction
 
 class Strategy_Defender(Base_Defender):
     """
     it is a better replacement of random defender to increase difficulty of attack play
     """
     def think(self,tiles):
-        def recursive_dims(tiles,dims=0):
-            if type(tiles) is list:
-                dims=dims+1
-                dims=recursive_dims(tiles[0],dims)
-            return dims
-        dims=recursive_dims(tiles)
+        board=Board.from_trusted(tiles)
+        dims=len(board.get_shape())
         for dim in range(dims):
-            if (Board(load_tiles=tiles)).move(dim,-1):
+            if board.can_move(dim,-1):
                 return {"keepgoing":True,"dimension":dim,"direction":-1}
         for reversed_dim in range(dims-1,-1,-1):
-            if (Board(load_tiles=tiles)).move(reversed_dim,1):
+            if board.can_move(reversed_dim,1):
                 return {"keepgoing":True,"dimension":reversed_dim,"direction":1}
         else:
             return {"keepgoing":False,"dimension":None,"direction":None}
 
+class Search_Defender(Base_Defender):
+    """
+    it looks ahead with a depth-limited expectimax search over Board.move() and Board.place()
+
+    key properties:
+        TIME_BUDGET     float, seconds to think for each move, adjustable for all search defenders
+        TABLE_SIZE      int, the transposition table is cleared once it holds more entries than this
+        CHANCE_SAMPLES  int, at most so many empty tiles are considered for the next placement
+        __table         dictionary, {(board_key,depth):value}, transposition table kept through the round
+
+    remarks:
+        search deepens iteratively from depth 0 (judge the board right after each move),
+        the best move of the deepest search finished within TIME_BUDGET is taken,
+        depth 0 always finishes, even on a huge board which costs more than TIME_BUDGET.
+        it supposes the attacker places 2 (90%) or 4 (10%) on an empty tile at random,
+        on a board with more empty tiles than CHANCE_SAMPLES, a random sample of them is considered.
+    """
+    TIME_BUDGET=0.04
+    TABLE_SIZE=200000
+    CHANCE_SAMPLES=8
+    __NEIGHBOURS={} ### {shape:((offset,offset_of_next_tile),*) for each dimension}, see evaluate()
+
+    class __Time_Is_Up(Exception):
+        pass
+
+    def __init__(self,round_uuid):
+        super().__init__(round_uuid)
+        self.__table={}
+        self.__deadline=0
+
+    @classmethod
+    def evaluate(cls,board):
+        """
+        static value of a board for the defender, the higher the better
+
+        it rewards empty tiles and equal tiles next to each other,
+        and punishes a dimension where tiles neither keep rising nor keep falling
+        """
+        shape=board.get_shape()
+        if shape not in cls.__NEIGHBOURS:
+            neighbours=[]
+            stride=1
+            tile_count=len(board.get_exponents())
+            for dim_length in reversed(shape):
+                neighbours.insert(0,tuple([(offset,offset+stride) for offset in range(tile_count)\
+                                           if offset//stride%dim_length<dim_length-1]))
+                stride=stride*dim_length
+            if len(cls.__NEIGHBOURS)>=64:
+                cls.__NEIGHBOURS.clear()
+            cls.__NEIGHBOURS[shape]=tuple(neighbours)
+        exponents=board.get_exponents()
+        merges=0
+        penalty=0
+        for dim_neighbours in cls.__NEIGHBOURS[shape]:
+            rising=0
+            falling=0
+            for offset,next_offset in dim_neighbours:
+                exponent=exponents[offset]
+                next_exponent=exponents[next_offset]
+                if exponent==next_exponent:
+                    if exponent>0:
+                        merges=merges+1
+                elif exponent<next_exponent:
+                    rising=rising+next_exponent*next_exponent-exponent*exponent
+                else:
+                    falling=falling+exponent*exponent-next_exponent*next_exponent
+            penalty=penalty+min(rising,falling)
+        return 270*exponents.count(0)+700*merges-47*penalty
+
+    def __chance(self,board,depth):
+        """expected value of a board right after a move, the attacker is about to place"""
+        if depth==0:
+            return Search_Defender.evaluate(board)
+        key=(board.get_key(),depth)
+        if key in self.__table:
+            return self.__table[key]
+        if monotonic()>self.__deadline:
+            raise Search_Defender.__Time_Is_Up()
+        empty_locations=board.get_empty_locations()
+        if len(empty_locations)>Search_Defender.CHANCE_SAMPLES:
+            empty_locations=random.sample(empty_locations,Search_Defender.CHANCE_SAMPLES)
+        value=0
+        for location in empty_locations:
+            for number,probability in ((2,0.9),(4,0.1)):
+                next_board=board.clone()
+                next_board.place(location,number)
+                value=value+probability*self.__best(next_board,depth-1)[0]
+        value=value/len(empty_locations) if len(empty_locations)>0 else Search_Defender.evaluate(board)
+        if len(self.__table)>=Search_Defender.TABLE_SIZE:
+            self.__table.clear()
+        self.__table[key]=value
+        return value
+
+    def __best(self,board,depth):
+        """(value,[dimension,direction]) of the best move, the move is None if nothing can move"""
+        best_value=None
+        best_move=None
+        for dim,direction in board.legal_moves():
+            next_board=board.clone()
+            next_board.move(dim,direction)
+            value=self.__chance(next_board,depth)
+            if best_value is None or value>best_value:
+                best_value=value
+                best_move=[dim,direction]
+        if best_move is None:
+            return Search_Defender.evaluate(board)-100000,None
+        return best_value,best_move
+
+    def think(self,tiles):
+        board=Board.from_trusted(tiles)
+        self.__deadline=monotonic()+Search_Defender.TIME_BUDGET
+        decided_move=self.__best(board,0)[1] ### depth 0 always finishes
+        depth=1
+        while decided_move is not None and monotonic()<self.__deadline:
+            try:
+                decided_move=self.__best(board,depth)[1]
+            except Search_Defender.__Time_Is_Up:
+                break
+            depth=depth+1
+        if decided_move is not None:
+            return {"keepgoing":True,"dimension":decided_move[0],"direction":decided_move[1]}
+        else:
+            return {"keepgoing":False,"dimension":None,"direction":None}
+
 
 class Round():
     """
@@ -658,13 +1721,23 @@ class Round():
         __board_tiles           list, pass to board
         __attacker_type         str, pass to board
         __defender_type         str, pass to board
+        __quiet                 bool, True to log errors only, for headless simulation
+        __summary               dictionary, round_score, moves and max_tile, available after start()
+        __record                Game_Record, every executed instruction of this round, available once play() starts
 
     key methods:
-        start()                 int, it manages the life cycle of a game, and returns a score
+        play()                  generator, the life cycle of a game step by step, it returns a score
+        start()                 int, drive play() with players thinking in turn, and return the score
+        start_async()           int, drive play() in an event loop with players awaited, and return the score
         get_score()             int, for each tile, score=tile*(log(tile,2)-1), sum them up
+        get_summary()           dictionary, None until start() returns
+        get_record()            Game_Record, None until play() starts, it grows as the round goes on
 
     remarks:
-        round.start() doesn't care the game mode and player type.
+        round.play() doesn't care the game mode and player type.
+        each time it needs an instruction, it yields the player and board tiles and waits,
+        the driver sends the instruction back, or throws what the player raised while thinking.
+        so a waiting round costs no thread, a paused generator only.
         it manages the gameplay itself:
             create a new game board
             ask attacker for an instruction
@@ -680,10 +1753,30 @@ class Round():
         self.__board_tiles=json.loads(round_parameters.get("board_tiles","[]"))
         self.__attacker_type=round_parameters.get("attacker_type","Random")
         self.__defender_type=round_parameters.get("defender_type","Manual")
+        self.__quiet=round_parameters.get("quiet",False)
+        self.__summary=None
+        self.__record=None
 
     def get_uuid(self):
         return self.__uuid
 
+    def get_attacker_type(self):
+        return self.__attacker_type
+
+    def get_defender_type(self):
+        return self.__defender_type
+
+    def get_summary(self):
+        return self.__summary
+
+    def get_record(self):
+        return self.__record
+
+    def __log(self,log_level,log_message,log_details={}):
+        """Logger.log() on behalf of this round, a quiet round logs errors only, log_details can be a callable as in Logger.log()"""
+        if (not self.__quiet or log_level=="ERROR") and Logger.is_enabled(log_level):
+            Logger.log(log_level,log_message,self.get_uuid(),log_details)
+
     def get_score(self,tiles,score=0):
         for sub_tiles in tiles:
             if type(sub_tiles) is list:
@@ -692,25 +1785,63 @@ class Round():
                 score=score+(0 if sub_tiles==0 else sub_tiles*int(log(sub_tiles,2)-1))
         return score
 
+    def __instruct(self,player,tiles):
+        if isinstance(player,Base_Attacker):
+            return player.get_place_instruction(tiles)
+        return player.get_move_instruction(tiles)
+
+    async def __instruct_async(self,player,tiles):
+        if isinstance(player,Base_Attacker):
+            return await player.get_place_instruction_async(tiles)
+        return await player.get_move_instruction_async(tiles)
+
     def start(self):
+        gameplay=self.play()
+        try:
+            player,tiles=next(gameplay)
+            while True:
+                try:
+                    instruction=self.__instruct(player,tiles)
+                except BaseException as err:
+                    player,tiles=gameplay.throw(err)
+                else:
+                    player,tiles=gameplay.send(instruction)
+        except StopIteration as stop:
+            return stop.value
+
+    async def start_async(self):
+        gameplay=self.play()
+        try:
+            player,tiles=next(gameplay)
+            while True:
+                try:
+                    instruction=await self.__instruct_async(player,tiles)
+                except BaseException as err:
+                    player,tiles=gameplay.throw(err)
+                else:
+                    player,tiles=gameplay.send(instruction)
+        except StopIteration as stop:
+            return stop.value
+        except SystemExit: ### the round quits by force, which must not stop the event loop
+            return None
+
+    def play(self):
         try:
             board=Board(self.__board_shape,load_tiles=self.__board_tiles)
             attacker=eval(self.__attacker_type+"_Attacker('"+self.get_uuid()+"')")
             if type(attacker).__base__ is not Base_Attacker:
-                Logger.log("ERROR","Attacker is not properly derived, quit by force",\
-                               self.get_uuid(),\
+                self.__log("ERROR","Attacker is not properly derived, quit by force",\
                                {"attacker_type":self.__attacker_type}\
                           )
                 sys.exit()
             defender=eval(self.__defender_type+"_Defender('"+self.get_uuid()+"')")
             if type(defender).__base__ is not Base_Defender:
-                Logger.log("ERROR","Defender is not properly derived, quit by force",\
-                               self.get_uuid(),\
+                self.__log("ERROR","Defender is not properly derived, quit by force",\
                                {"defender_type":self.__defender_type}\
                           )
                 sys.exit()
-            Logger.log("INFO","New round started",\
-                           self.get_uuid(),\
+            self.__record=Game_Record(board.get_shape(),board.get_exponents())
+            self.__log("INFO","New round started",\
                            {"board_shape":board.get_shape(),\
                             "board_tiles":board.get_tiles(),\
                             "attacker_type":self.__attacker_type,\
@@ -718,8 +1849,7 @@ class Round():
                            }\
                       )
         except Exception as err:
-            Logger.log("ERROR","New round failed to start, quit by force",\
-                           self.get_uuid(),\
+            self.__log("ERROR","New round failed to start, quit by force",\
                            {"ERROR_MESSAGE":str(err),\
                             "board_shape":self.__board_shape,\
                             "board_tiles":self.__board_tiles,\
@@ -728,131 +1858,469 @@ class Round():
                            }\
                       )
             sys.exit()
+        moves=0
         round_ended=False
         while round_ended==False:
             while round_ended==False:
                 try:
-                    attacker_instruction=attacker.get_place_instruction(board.get_tiles())
-                    Logger.log("DEBUG","Attacker decided",\
-                                   self.get_uuid(),\
-                                   {"attacker_instruction":attacker_instruction}\
+                    attacker_instruction=yield attacker,board.get_tiles()
+                    self.__log("DEBUG","Attacker decided",\
+                                   lambda:{"attacker_instruction":attacker_instruction}\
                               )
                 except SystemExit as err:
-                    Logger.log("ERROR","Fatal error occurred while attacker is thinking, quit by force",\
-                                   self.get_uuid(),\
+                    self.__log("ERROR","Fatal error occurred while attacker is thinking, quit by force",\
                                    {"ERROR_MESSAGE":str(err)}\
                               )
                     sys.exit()
                 except Exception as err:
-                    Logger.log("ERROR","Attacker failed to think, try to rethink",\
-                                   self.get_uuid(),\
+                    self.__log("ERROR","Attacker failed to think, try to rethink",\
                                    {"ERROR_MESSAGE":str(err)}\
                               )
                     continue
                 if not round_ended and attacker_instruction["keepgoing"]:
                     place_succeeded=board.place(attacker_instruction["location"])
                     if place_succeeded:
-                        Logger.log("DEBUG","Attacker has executed the instruction",\
-                                       self.get_uuid(),\
-                                       {"board_tiles":board.get_tiles()}\
+                        self.__record.add_placement(attacker_instruction["location"],board)
+                        self.__log("DEBUG","Attacker has executed the instruction",\
+                                       lambda:{"board_tiles":board.get_tiles()}\
                                   )
                         break
                     else:
-                        Logger.log("DEBUG","Attacker failed to execute the instruction",\
-                                       self.get_uuid()\
+                        self.__log("DEBUG","Attacker failed to execute the instruction"\
                                   )
                         continue
                 else:
-                    Logger.log("DEBUG","Attacker surrendered, try to end this round",\
-                                   self.get_uuid()\
+                    self.__log("DEBUG","Attacker surrendered, try to end this round"\
                               )
                     round_ended=True
                     break
             while round_ended==False:
                 try:
-                    defender_instruction=defender.get_move_instruction(board.get_tiles())
-                    Logger.log("DEBUG","Defender decided",\
-                                   self.get_uuid(),\
-                                   {"defender_instruction":defender_instruction}\
+                    defender_instruction=yield defender,board.get_tiles()
+                    self.__log("DEBUG","Defender decided",\
+                                   lambda:{"defender_instruction":defender_instruction}\
                               )
                 except SystemExit as err:
-                    Logger.log("ERROR","Fatal error occurred while defender is thinking, quit by force",\
-                                   self.get_uuid(),\
+                    self.__log("ERROR","Fatal error occurred while defender is thinking, quit by force",\
                                    {"ERROR_MESSAGE":str(err)}\
                               )
                     sys.exit()
                 except Exception as err:
-                    Logger.log("ERROR","Defender failed to think, try to rethink",\
-                                   self.get_uuid(),\
+                    self.__log("ERROR","Defender failed to think, try to rethink",\
                                    {"ERROR_MESSAGE":str(err)}\
                               )
                     continue
                 if not round_ended and defender_instruction["keepgoing"]:
                     move_succeeded=board.move(defender_instruction["dimension"],defender_instruction["direction"])
                     if move_succeeded:
-                        Logger.log("DEBUG","Defender has executed the instruction",\
-                                       self.get_uuid(),\
-                                       {"board_tiles":board.get_tiles()}\
+                        moves=moves+1
+                        self.__record.add_move(defender_instruction["dimension"],defender_instruction["direction"],board)
+                        self.__log("DEBUG","Defender has executed the instruction",\
+                                       lambda:{"board_tiles":board.get_tiles()}\
                                   )
                         break
                     else:
-                        Logger.log("DEBUG","Defender failed to execute the instruction",\
-                                       self.get_uuid()\
+                        self.__log("DEBUG","Defender failed to execute the instruction"\
                                   )
                         continue
                 else:
-                    Logger.log("DEBUG","Defender surrendered, try to end this round",\
-                                   self.get_uuid()\
+                    self.__log("DEBUG","Defender surrendered, try to end this round"\
                               )
                     round_ended=True
                     break
         round_score=self.get_score(board.get_tiles())
-        Logger.log("INFO","Round ended",\
-                       self.get_uuid(),\
-                       {"round_score":round_score,\
-                           "board_tiles":board.get_tiles()\
+        max_exponent=max(board.get_exponents())
+        self.__summary={"round_score":round_score,"moves":moves,"max_tile":2**max_exponent if max_exponent>0 else 0}
+        self.__record.finish(round_score)
+        self.__log("INFO","Round ended",\
+                       lambda:{"round_score":round_score,\
+                           "board_tiles":board.get_tiles(),\
+                           "game_record":b64encode(self.__record.to_bytes()).decode()\
                        }\
                   )
         return round_score
 
 
+class Simulator():
+    """
+    simulator plays robot rounds in batch without console or logging each step, and sums them up
+
+    key methods:
+        run()                   dictionary, play rounds and return statistics
+        create_pool()           ProcessPoolExecutor, worker processes that run() can reuse batch after batch
+        play_rounds()           list, play some rounds of a batch and return their summaries
+        play_vectorized()       list, play Random against Random on all boards of a Board_Batch at once
+        summarize()             dictionary, statistics of summaries of rounds, see Round.get_summary()
+
+    remarks:
+        simulator class is not allowed to initialize an instance.
+        rounds are independent, so a batch can be spread across processes,
+        each round seeds random module from the seed of the batch and its own index,
+        so a batch plays exactly the same rounds no matter how many processes there are.
+    """
+    def __init__(self):
+        raise Exception("Simulator class is not allowed to initialize")
+
+    @classmethod
+    def run(cls,games,*,board_shape="[4,4]",board_tiles="[]",attacker_type="Random",defender_type="Random",\
+            seed=None,workers=1,quiet=True,vectorized=False,pool=None):
+        """
+        parameters:
+            games           required, int, how many rounds to play
+            board_shape     optional, str, JSON of the shape as in Round
+            board_tiles     optional, str, JSON of the tiles as in Round
+            attacker_type   optional, str, any attacker type but Manual and Online
+            defender_type   optional, str, any defender type but Manual and Online
+            seed            optional, int, seed of the batch, a random one is picked if omitted
+            workers         optional, int, how many processes to play in parallel, 1 means no extra process
+            quiet           optional, bool, False to log each round as usual
+            vectorized      optional, bool, True to play with play_vectorized(), workers and quiet are ignored
+            pool            optional, ProcessPoolExecutor from create_pool(), a new one is created and shut down if omitted
+
+        return:
+            dictionary      statistics from summarize(), with the parameters above
+        """
+        if attacker_type in ("Manual","Online") or defender_type in ("Manual","Online"):
+            raise Exception("Only robot players can be simulated")
+        if seed is None:
+            seed=random.randrange(2**32)
+        play_rounds=partial(cls.play_rounds,board_shape=board_shape,board_tiles=board_tiles,\
+                            attacker_type=attacker_type,defender_type=defender_type,seed=seed,quiet=quiet)
+        started=monotonic()
+        if vectorized:
+            if attacker_type!="Random" or defender_type!="Random":
+                raise Exception("Only Random players can be simulated in vectorized form")
+            summaries=cls.play_vectorized(games,board_shape=board_shape,board_tiles=board_tiles,seed=seed)
+        elif workers>1:
+            chunk_size=max(1,-(-games//(workers*4))) ### a few chunks per worker to balance the load
+            chunks=[range(start,min(start+chunk_size,games)) for start in range(0,games,chunk_size)]
+            if pool is None:
+                with cls.create_pool(workers) as pool:
+                    summaries=[summary for chunk_summaries in pool.map(play_rounds,chunks) for summary in chunk_summaries]
+            else:
+                summaries=[summary for chunk_summaries in pool.map(play_rounds,chunks) for summary in chunk_summaries]
+        else:
+            summaries=play_rounds(range(games))
+        statistics=cls.summarize(summaries,monotonic()-started)
+        statistics.update({"board_shape":board_shape,"board_tiles":board_tiles,"attacker_type":attacker_type,"defender_type":defender_type,\
+                           "seed":seed,"workers":workers,"vectorized":vectorized})
+        return statistics
+
+    @classmethod
+    def create_pool(cls,workers):
+        """
+        parameters:
+            workers         required, int, how many processes to play in parallel
+
+        return:
+            ProcessPoolExecutor     its processes start logging without DEBUG,
+                                    the caller shuts it down, e.g. with a with statement
+        """
+        Bit_Board() ### build the move tables here once, so every forked process inherits them instead of building its own
+        return ProcessPoolExecutor(max_workers=workers,initializer=partial(Logger.start,excluded_levels=["DEBUG"]))
+
+    @classmethod
+    def play_vectorized(cls,games,*,board_shape,board_tiles,seed):
+        """
+        play Random attacker against Random defender in all rounds together with a Board_Batch,
+        the rules are the same as Round, but the rounds differ from play_rounds() with the same seed
+        """
+        board=Board(tuple(json.loads(board_shape)),load_tiles=json.loads(board_tiles))
+        batch_seed,choice_seed=numpy.random.SeedSequence(seed).spawn(2)
+        batch=Board_Batch(games,board.get_shape(),seed=batch_seed)
+        for index in range(games):
+            batch.load_board(index,board)
+        choices=numpy.random.default_rng(choice_seed)
+        alive=numpy.ones(games,dtype=bool)
+        moves=numpy.zeros(games,dtype=numpy.int64)
+        while alive.any():
+            alive=alive&batch.place(alive) ### the attacker surrenders without any empty tile
+            legal_moves=batch.legal_moves()
+            alive=alive&legal_moves.any(axis=1) ### the defender surrenders without any legal move
+            keys=choices.random(legal_moves.shape)
+            keys[~legal_moves]=-1
+            decided_moves=keys.argmax(axis=1)
+            for move in range(legal_moves.shape[1]):
+                batch.move(move//2,(-1,1)[move%2],alive&(decided_moves==move))
+            moves[alive]=moves[alive]+1
+        exponents=batch.get_exponents().reshape(games,-1).astype(numpy.int64)
+        scores=numpy.where(exponents>1,numpy.left_shift(1,exponents)*(exponents-1),0).sum(axis=1)
+        max_exponents=exponents.max(axis=1)
+        return [{"round_score":int(scores[index]),"moves":int(moves[index]),\
+                 "max_tile":2**int(max_exponents[index]) if max_exponents[index]>0 else 0} for index in range(games)]
+
+    @classmethod
+    def play_rounds(cls,indexes,*,board_shape,board_tiles,attacker_type,defender_type,seed,quiet):
+        """play the rounds with the given indexes of a batch, see run() for parameters"""
+        summaries=[]
+        for index in indexes:
+            random.seed(str(seed)+"-"+str(index))
+            round=Round(board_shape=board_shape,board_tiles=board_tiles,\
+                        attacker_type=attacker_type,defender_type=defender_type,quiet=quiet)
+            try:
+                round.start()
+            except SystemExit:
+                raise Exception("Round failed to start, see log for details")
+            summaries.append(round.get_summary())
+        Logger.wait_till_finish() ### a worker process may exit without flushing the log buffer
+        return summaries
+
+    @classmethod
+    def summarize(cls,summaries,seconds):
+        """
+        parameters:
+            summaries       required, list, summaries of rounds from Round.get_summary()
+            seconds         required, float, time spent on the rounds
+
+        return:
+            dictionary      games, round_score, max_tile, moves, seconds and games_per_second,
+                            round_score has min, max, mean, median and deciles,
+                            max_tile counts rounds by their max tile,
+                            moves has min, max and mean
+        """
+        statistics={"games":len(summaries),"round_score":None,"max_tile":{},"moves":None,\
+                    "seconds":seconds,"games_per_second":len(summaries)/seconds if seconds>0 else None}
+        if len(summaries)==0:
+            return statistics
+        scores=[summary["round_score"] for summary in summaries]
+        statistics["round_score"]={"min":min(scores),"max":max(scores),"mean":mean(scores),"median":median(scores),\
+                                   "deciles":quantiles(scores,n=10) if len(scores)>1 else scores}
+        for max_tile in sorted([summary["max_tile"] for summary in summaries]):
+            statistics["max_tile"][str(max_tile)]=statistics["max_tile"].get(str(max_tile),0)+1
+        moves=[summary["moves"] for summary in summaries]
+        statistics["moves"]={"min":min(moves),"max":max(moves),"mean":mean(moves)}
+        return statistics
+
+
+class Online_Round():
+    """
+    state of an online round in Server.ONLINE_ROUNDS, a compact record with __slots__ instead of a dictionary
+
+    key properties:
+        round                   Round, None until the round task creates it
+        task                    asyncio.Task, of the round in the event loop of Server
+        board_tiles             list, tiles when an online player was asked last time
+        attacker_type           str
+        attacker_wait           bool, True when the online attacker is waiting for an instruction
+        attacker_instruction    dictionary, the same one is filled in for each place instruction
+        defender_type           str
+        defender_wait           bool, True when the online defender is waiting for an instruction
+        defender_instruction    dictionary, the same one is filled in for each move instruction
+        instruction_future      asyncio.Future, awaited by the waiting online player
+        last_visit              float, monotonic() when a client requested the round last time
+        last_update             float, monotonic() when an online player received an instruction last time
+        unoccupied_role         str, Attacker or Defender when the invitation is not visited yet
+        round_score             int, -1 until the round ends
+        version                 int, increased on each change watchers can see
+        watch_future            asyncio.Future, awaited by watchers, None if nobody watches
+        watchers                int, long polls in progress
+        board_shape             list, shape of board_tiles
+        flat_tiles              list, board_tiles in row-major order
+        tile_versions           list, the version each flat tile changed at
+
+    key methods:
+        copy()                  Online_Round, a copy of the given fields or all fields, lists are copied as well
+        get_datetime()          datetime, convert a monotonic() timestamp to the wall clock, for display
+    """
+    __slots__=("round","task","board_tiles",\
+               "attacker_type","attacker_wait","attacker_instruction",\
+               "defender_type","defender_wait","defender_instruction",\
+               "instruction_future","last_visit","last_update","unoccupied_role","round_score",\
+               "version","watch_future","watchers","board_shape","flat_tiles","tile_versions")
+
+    def __init__(self,attacker_type="",defender_type="",unoccupied_role=""):
+        self.round=None
+        self.task=None
+        self.board_tiles=[]
+        self.attacker_type=attacker_type
+        self.attacker_wait=False
+        self.attacker_instruction={"keepgoing":False,"location":None}
+        self.defender_type=defender_type
+        self.defender_wait=False
+        self.defender_instruction={"keepgoing":False,"dimension":None,"direction":None}
+        self.instruction_future=None
+        self.last_visit=monotonic()
+        self.last_update=self.last_visit
+        self.unoccupied_role=unoccupied_role
+        self.round_score=-1
+        self.version=0
+        self.watch_future=None
+        self.watchers=0
+        self.board_shape=[]
+        self.flat_tiles=[]
+        self.tile_versions=[]
+
+    def copy(self,*keys):
+        """lists and dictionaries are copied because some of them are updated in place, fields not given are left unset"""
+        online_round=Online_Round.__new__(Online_Round)
+        for key in keys or Online_Round.__slots__:
+            value=getattr(self,key)
+            if type(value) is list:
+                value=list(value)
+            elif type(value) is dict:
+                value=dict(value)
+            setattr(online_round,key,value)
+        return online_round
+
+    @staticmethod
+    def get_datetime(timestamp):
+        return datetime.now()-timedelta(seconds=monotonic()-timestamp)
+
+
+class Round_Registry():
+    """
+    thread-safe registry of online rounds, Server.ONLINE_ROUNDS is an instance of it
+
+    rounds are spread over stripes by their uuids, each stripe has its own dictionary and lock,
+    so that threads working on different rounds rarely wait for each other
+
+    key properties:
+        STRIPES             int, how many stripes a registry has
+        __stripes           list, dictionaries of rounds, {uuid:an_instance_of_online_round,*}
+        __locks             list, a threading.RLock for each stripe
+        __count             int, how many rounds are in all stripes
+        __count_lock        threading.Lock, guard __count, add() holds it while it checks the limit and adds a round
+
+    key methods:
+        lock()              threading.RLock, the lock of the stripe of a round, hold it to read or write fields together
+        add()               bool, add a round, False if there are already as many rounds as the limit
+        get()               Online_Round, None if it does not exist
+        update()            bool, set fields of a round atomically, False if it does not exist
+        snapshot()          Online_Round, a consistent copy of fields of a round, None if it does not exist
+        remove()            None, remove a round if it exists
+        uuids()             list, a copy of uuids of all rounds, safe to iterate while rounds come and go
+
+    remarks:
+        it also supports len(), IN and [] to read like a dictionary.
+        add() takes __count_lock before a stripe lock, nothing takes them the other way round,
+        so never call add() or remove() while holding lock().
+    """
+    STRIPES=64
+
+    def __init__(self):
+        self.__stripes=[{} for _ in range(Round_Registry.STRIPES)]
+        self.__locks=[threading.RLock() for _ in range(Round_Registry.STRIPES)]
+        self.__count=0
+        self.__count_lock=threading.Lock()
+
+    def __stripe_index(self,round_uuid):
+        return hash(round_uuid)%Round_Registry.STRIPES
+
+    def __len__(self):
+        return self.__count
+
+    def __contains__(self,round_uuid):
+        return self.get(round_uuid) is not None
+
+    def __getitem__(self,round_uuid):
+        online_round=self.get(round_uuid)
+        if online_round is None:
+            raise KeyError(round_uuid)
+        return online_round
+
+    def lock(self,round_uuid):
+        return self.__locks[self.__stripe_index(round_uuid)]
+
+    def add(self,round_uuid,online_round,limit=None):
+        index=self.__stripe_index(round_uuid)
+        with self.__count_lock:
+            if limit is not None and self.__count>=limit:
+                return False
+            with self.__locks[index]:
+                if round_uuid not in self.__stripes[index]:
+                    self.__count=self.__count+1
+                self.__stripes[index][round_uuid]=online_round
+        return True
+
+    def get(self,round_uuid):
+        index=self.__stripe_index(round_uuid)
+        with self.__locks[index]:
+            return self.__stripes[index].get(round_uuid)
+
+    def update(self,round_uuid,**fields):
+        index=self.__stripe_index(round_uuid)
+        with self.__locks[index]:
+            online_round=self.__stripes[index].get(round_uuid)
+            if online_round is None:
+                return False
+            for key,value in fields.items():
+                setattr(online_round,key,value)
+            return True
+
+    def snapshot(self,round_uuid,*keys):
+        """see Online_Round.copy()"""
+        index=self.__stripe_index(round_uuid)
+        with self.__locks[index]:
+            online_round=self.__stripes[index].get(round_uuid)
+            if online_round is None:
+                return None
+            return online_round.copy(*keys)
+
+    def remove(self,round_uuid):
+        index=self.__stripe_index(round_uuid)
+        with self.__locks[index]:
+            removed=self.__stripes[index].pop(round_uuid,None) is not None
+        if removed:
+            with self.__count_lock:
+                self.__count=self.__count-1
+
+    def uuids(self):
+        round_uuids=[]
+        for index in range(Round_Registry.STRIPES):
+            with self.__locks[index]:
+                round_uuids.extend(self.__stripes[index].keys())
+        return round_uuids
+
+
 class Server():
     """
     server class hosts a web interface and manages online game data
 
     key properties:
         __is_stopped                bool
-        ONLINE_ROUNDS               dictionary, the structure is {uuid:{k:w,*},*}
-                                                "k:w" for example:
-                                                    "round":an_instance_of_round,
-                                                    "board_tiles":an_list_of_tiles,
-                                                    ......
-                                                    "attacker_wait":true_or_false
-                                                    ......
-                                                    "last_update":str_of_datetime_now
-                                                    ......
+        __LOOP                      asyncio event loop, all online rounds run in it as tasks of Round.start_async()
+        MAX_ONLINE_ROUNDS           int, how many online rounds can be hosted at the same time
+        ONLINE_ROUNDS               Round_Registry, the structure is {uuid:an_instance_of_online_round,*}
+
+        KEEP_ALIVE_TIMEOUT          int, seconds to keep an idle HTTP connection open
+        LONG_POLL_TIMEOUT           int, seconds to hold a watch request if nothing changes
+        WEBSOCKET_MESSAGE_LIMIT     int, bytes of a WebSocket message with all its frames, a longer one closes the connection
+        ROUND_END_TIMEOUT           int, seconds without any visit or update before a pending round is ended
+        ROUND_DELETE_TIMEOUT        int, seconds without any visit or update before an ended round is deleted
 
     key methods:
-        __server_daemon()           None, it implements a web interface and its logics
-        __clean_online_rounds()     None, garbage collection method with infinite loop
-        serve_forever()             None, call __clean_online_rounds() and __server_daemon()
+        __server_daemon()           None, it implements a web interface and its logics over HTTP/1.1 with keep-alive,
+                                    and over WebSocket for a round
+        __parse_count()             int, a request parameter of digits, or the default if it isn't one
+        __arm_expiry()              None, schedule __expire() of a round at a deadline in __LOOP
+        __expire()                  None, end or delete a round if it has been left alone long enough, or re-arm its timer
+        __check_round_task()        None, done callback of a round task, log the exception it raised, nothing else awaits it
+        __hand_over()               None, wake up the online player awaiting an instruction of a round, from any thread
+        notify_watchers()           None, increase the version of a round and wake up its watchers, in __LOOP only,
+                                    with new board tiles, it stamps the changed tiles with the new version
+        __update_version()          None, implement notify_watchers() while the lock of the round is held
+        serve_forever()             None, run __LOOP and call __server_daemon(),
+                                    robot players think in a thread pool of the given number of workers
 
     remarks:
         server class is not allowed to initialize an instance.
     """
     __is_stopped=True
-    ONLINE_ROUNDS={}
-
-    class __class_for_hiding_console_log_only(wsgi.WSGIRequestHandler):
-        def log_message(self,format,*args):
-            pass
+    __LOOP=None
+    MAX_ONLINE_ROUNDS=50000
+    KEEP_ALIVE_TIMEOUT=15
+    LONG_POLL_TIMEOUT=25
+    WEBSOCKET_MESSAGE_LIMIT=65536
+    ROUND_END_TIMEOUT=300
+    ROUND_DELETE_TIMEOUT=30
+    ONLINE_ROUNDS=Round_Registry()
 
     def __init__(self):
         raise Exception("Server class is not allowed to initialize")
 
     @classmethod
-    def __server_daemon(cls):
-        def server_process(environment,response_header):
+    def __server_daemon(cls,host,port):
+        async def server_process(environment,response_header):
             """
             this IF block below implements a simple web client which can be accessed via:
                 http://<your_ip_or_hostname>/
@@ -860,7 +2328,6 @@ class Server():
                 http://<your_ip_or_hostname>/<Attacker_or_Defender>&<one_36_characters_uuid>
             the latter one is for inviting opponent.
             """
-            sleep(0.01)
             if environment["QUERY_STRING"]==""\
                 and environment["PATH_INFO"]!="/favicon.ico"\
                 or\
@@ -869,15 +2336,18 @@ class Server():
                 and len(environment["QUERY_STRING"].split("&")[1])==36:
                 Logger.log("DEBUG","Page request received",\
                            "",\
-                           {"REMOTE_ADDR":environment["REMOTE_ADDR"],\
+                           lambda:{"REMOTE_ADDR":environment["REMOTE_ADDR"],\
                             "QUERY_STRING":str(environment["QUERY_STRING"])\
                            }\
                       )
                 if len(environment["QUERY_STRING"].split("&"))==2\
-                    and environment["QUERY_STRING"].split("&")[0] in ("Attacker","Defender")\
-                    and environment["QUERY_STRING"].split("&")[1] in cls.ONLINE_ROUNDS\
-                    and cls.ONLINE_ROUNDS[environment["QUERY_STRING"].split("&")[1]]["unoccupied_role"]==environment["QUERY_STRING"].split("&")[0]:
-                    cls.ONLINE_ROUNDS[environment["QUERY_STRING"].split("&")[1]]["unoccupied_role"]=""
+                    and environment["QUERY_STRING"].split("&")[0] in ("Attacker","Defender"):
+                    invited_role,invited_uuid=environment["QUERY_STRING"].split("&")
+                    with cls.ONLINE_ROUNDS.lock(invited_uuid):
+                        invited_round=cls.ONLINE_ROUNDS.get(invited_uuid)
+                        if invited_round is not None and invited_round.unoccupied_role==invited_role:
+                            invited_round.unoccupied_role=""
+                            cls.notify_watchers(invited_uuid)
                 status="200 OK"
                 headers=[("Content-type","text/html; charset=utf-8")]
                 response_header(status, headers)
@@ -1062,6 +2532,8 @@ class Server():
                     this.uuid=null
                     this.round_json=null
                     this.action_block=false
+                    this.socket=null
+                    this.socket_callback=null
 
                     this.btn_quick_start=document.getElementById("btn_quick_start")
                     this.btn_join=document.getElementById("btn_join")
@@ -1194,16 +2666,67 @@ class Server():
                         obj.role=role
                         obj.uuid=uuid
                         obj.render(obj)
+                        obj.connect(obj)
+                    }
+
+                    this.connect=function(obj=this){
+                        if(!("WebSocket" in window)){
+                            return // keep watching over HTTP
+                        }
+                        var socket=new WebSocket((window.location.protocol=="https:"?"wss://":"ws://")+window.location.host+"/?socket&uuid="+obj.uuid)
+                        socket.onopen=function(){
+                            obj.socket=socket
+                        }
+                        socket.onmessage=function(event){
+                            var json=JSON.parse(event.data)
+                            if("version" in json||json.uuid==null){ // pushed changes
+                                obj.callback_render(obj,json)
+                            }
+                            else if(obj.socket_callback!=null){
+                                var callback=obj.socket_callback
+                                obj.socket_callback=null
+                                callback(obj,json)
+                            }
+                        }
+                        socket.onclose=function(){
+                            if(obj.socket==socket){
+                                obj.socket=null
+                                obj.action_block=false
+                                obj.render(obj) // fall back to watching over HTTP
+                            }
+                        }
                     }
 
                     this.render=function(obj=this){
-                        if(obj.role!=null&&obj.uuid!=null&&!obj.action_block){
+                        if(obj.role!=null&&obj.uuid!=null&&!obj.action_block&&obj.socket==null){
                             obj.action_block=true
-                            obj.request("display&uuid="+obj.uuid,obj,obj.callback_render)
+                            obj.request("watch&uuid="+obj.uuid+"&since="+(obj.round_json!=null&&"version" in obj.round_json?obj.round_json.version:-1),obj,obj.callback_render)
                         }
                     }
 
                     this.callback_render=function(obj,json){
+                        if(json==null){ // 304, nothing changed, watch again
+                            obj.action_block=false
+                            obj.render(obj)
+                            return
+                        }
+                        if(obj.round_json!=null&&"version" in obj.round_json&&"version" in json&&json.version<obj.round_json.version){
+                            obj.action_block=false // outdated, it has been pushed
+                            return
+                        }
+                        if("changed_tiles" in json){
+                            var board_tiles=(obj.round_json!=null&&"board_tiles" in obj.round_json)?obj.round_json.board_tiles:[]
+                            if(json.board_shape.length!=2||board_tiles.length!=json.board_shape[0]||board_tiles.length>0&&board_tiles[0].length!=json.board_shape[1]){
+                                board_tiles=[]
+                                for(var row=0;json.board_shape.length==2&&row<json.board_shape[0];row++){
+                                    board_tiles.push(new Array(json.board_shape[1]).fill(0))
+                                }
+                            }
+                            for(var change=0;json.board_shape.length==2&&change<json.changed_tiles.length;change++){
+                                board_tiles[Math.floor(json.changed_tiles[change][0]/json.board_shape[1])][json.changed_tiles[change][0]%json.board_shape[1]]=json.changed_tiles[change][1]
+                            }
+                            json.board_tiles=board_tiles
+                        }
                         obj.uuid=json.uuid
                         obj.round_json=json
                         if(obj.uuid!=null&&obj.round_json!=null){
@@ -1250,6 +2773,9 @@ class Server():
                             obj.round_json=null
                             obj.show("START or JOIN a new game?")
                         }
+                        if(obj.is_game_in_progress()&&!obj.is_game_open_for_me()){
+                            obj.render(obj) // watch again, the server responds when the opponent has moved
+                        }
                     }
 
                     this.action=function(act,instruction,obj=this){
@@ -1299,10 +2825,8 @@ class Server():
                     this.callback_action=function(obj,json){
                         obj.uuid=json.uuid
                         if(obj.uuid!=null){
-                            setTimeout(function(){
-                                obj.action_block=false
-                                obj.render(obj)
-                            },300)
+                            obj.action_block=false
+                            obj.render(obj)
                         }
                         else{
                             obj.round_json=null
@@ -1326,9 +2850,14 @@ class Server():
                     }
 
                     this.request=function(command,obj,callback){
+                        if(obj.socket!=null&&obj.uuid!=null&&command.endsWith("&uuid="+obj.uuid)&&!command.startsWith("watch")){
+                            obj.socket_callback=callback
+                            obj.socket.send(command.slice(0,-("&uuid="+obj.uuid).length))
+                            return
+                        }
                         var xhttp=new XMLHttpRequest()
                         xhttp.open("GET","/?"+command,true)
-                        xhttp.timeout=4000
+                        xhttp.timeout=command.startsWith("watch")?30000:4000
                         xhttp.ontimeout=function(){
                             obj.request(command,obj,callback)
                             return
@@ -1338,9 +2867,9 @@ class Server():
                             return
                         }
                         xhttp.onreadystatechange=function(){
-                            if (this.readyState==4&&this.status==200){
+                            if (this.readyState==4&&(this.status==200||this.status==304)){
                                 if (typeof(callback)!="undefined"){
-                                    callback(obj,JSON.parse(xhttp.responseText))
+                                    callback(obj,this.status==304?null:JSON.parse(xhttp.responseText))
                                 }
                             }
                         }
@@ -1364,12 +2893,6 @@ class Server():
                         player.show("START or JOIN a new game?")
                         player.layout_control(player)
                     }
-                    
-                    setInterval(function(){
-                        if(player.is_game_in_progress()&&!player.is_game_open_for_me()){
-                            player.render(player)
-                        }
-                    },1000)
 
                     document.addEventListener("touchmove",function(event){event.preventDefault()},{passive:false})
 
@@ -1498,7 +3021,7 @@ class Server():
             request_uuid=str(uuid4())
             Logger.log("DEBUG","Request received",\
                            "",\
-                           {"request_uuid":request_uuid,\
+                           lambda:{"request_uuid":request_uuid,\
                             "REMOTE_ADDR":environment["REMOTE_ADDR"],\
                             "QUERY_STRING":environment["QUERY_STRING"]\
                            }\
@@ -1513,43 +3036,48 @@ class Server():
                 parameters[parameter[0]]="" if len(parameter)!=2 else unquote(parameter[1])
             response_body={}
             if "start" in parameters and parameters["start"]=="new":
-                if len(cls.ONLINE_ROUNDS)>=500:
+                round_uuid=str(uuid4())
+                arg_attacker_type=parameters.get("attacker_type","Random")
+                arg_defender_type=parameters.get("defender_type","Online")
+                if arg_attacker_type=="Manual": arg_attacker_type="Random"
+                if arg_defender_type=="Manual": arg_defender_type="Online"
+                if arg_attacker_type!="Online" and arg_defender_type!="Online": arg_defender_type="Online"
+                arg_unoccupied_role=""
+                if arg_attacker_type=="Online" and arg_defender_type=="Online" and parameters.get("unoccupied_role","") in ("Attacker","Defender"):
+                    arg_unoccupied_role=parameters["unoccupied_role"]
+                ### all fields are ready before the round is visible to other requests
+                if not cls.ONLINE_ROUNDS.add(round_uuid,\
+                                             Online_Round(arg_attacker_type,arg_defender_type,arg_unoccupied_role),\
+                                             cls.MAX_ONLINE_ROUNDS):
                     response_body={}
                     response_body["uuid"]=None
                     response_body["message"]="Too many players, please wait and retry later"
                     Logger.log("INFO","Too many players to start a new game","",{"request_uuid":request_uuid})
                 else:
-                    round_uuid=str(uuid4())
-                    cls.ONLINE_ROUNDS[round_uuid]={}
-                    def online_round():
-                        arg_attacker_type=parameters.get("attacker_type","Random")
-                        arg_defender_type=parameters.get("defender_type","Online")
-                        if arg_attacker_type=="Manual": arg_attacker_type="Random"
-                        if arg_defender_type=="Manual": arg_defender_type="Online"
-                        if arg_attacker_type!="Online" and arg_defender_type!="Online": arg_defender_type="Online"
-                        cls.ONLINE_ROUNDS[round_uuid]["round"]=Round(uuid=round_uuid,\
-                                        board_shape=parameters.get("board_shape","[4,4]"),\
-                                        board_tiles=parameters.get("board_tiles","[]"),\
-                                        attacker_type=arg_attacker_type,\
-                                        defender_type=arg_defender_type\
-                                        )
-                        cls.ONLINE_ROUNDS[round_uuid]["board_tiles"]=[]
-                        cls.ONLINE_ROUNDS[round_uuid]["attacker_type"]=arg_attacker_type
-                        cls.ONLINE_ROUNDS[round_uuid]["attacker_wait"]=False
-                        cls.ONLINE_ROUNDS[round_uuid]["attacker_instruction"]={}
-                        cls.ONLINE_ROUNDS[round_uuid]["defender_type"]=arg_defender_type
-                        cls.ONLINE_ROUNDS[round_uuid]["defender_wait"]=False
-                        cls.ONLINE_ROUNDS[round_uuid]["defender_instruction"]={}
-                        cls.ONLINE_ROUNDS[round_uuid]["last_visit"]=datetime.now()
-                        cls.ONLINE_ROUNDS[round_uuid]["last_update"]=datetime.now()
-                        cls.ONLINE_ROUNDS[round_uuid]["unoccupied_role"]=""
-                        if arg_attacker_type=="Online" and arg_defender_type=="Online" and parameters.get("unoccupied_role","") in ("Attacker","Defender"):
-                            cls.ONLINE_ROUNDS[round_uuid]["unoccupied_role"]=parameters["unoccupied_role"]
-                        cls.ONLINE_ROUNDS[round_uuid]["round_score"]=cls.ONLINE_ROUNDS[round_uuid]["round"].start()
+                    async def online_round():
+                        round=Round(uuid=round_uuid,\
+                                    board_shape=parameters.get("board_shape","[4,4]"),\
+                                    board_tiles=parameters.get("board_tiles","[]"),\
+                                    attacker_type=arg_attacker_type,\
+                                    defender_type=arg_defender_type\
+                                    )
+                        cls.ONLINE_ROUNDS.update(round_uuid,round=round)
+                        try:
+                            round_score=await round.start_async()
+                            if round_score is not None:
+                                cls.ONLINE_ROUNDS.update(round_uuid,round_score=round_score)
+                                cls.notify_watchers(round_uuid)
+                                try:
+                                    await asyncio.get_running_loop().run_in_executor(None,Game_Archive.append,round)
+                                except Exception as err:
+                                    Logger.log("ERROR","Round failed to be archived",round_uuid,{"ERROR_MESSAGE":str(err)})
+                        finally:
+                            cls.__arm_expiry(round_uuid,monotonic()+cls.ROUND_DELETE_TIMEOUT)
                     try:
-                        cls.ONLINE_ROUNDS[round_uuid]["thread"]=threading.Thread(target=online_round)
-                        cls.ONLINE_ROUNDS[round_uuid]["thread"].setDaemon(True)
-                        cls.ONLINE_ROUNDS[round_uuid]["thread"].start()
+                        task=asyncio.get_running_loop().create_task(online_round())
+                        task.add_done_callback(partial(cls.__check_round_task,round_uuid))
+                        cls.ONLINE_ROUNDS.update(round_uuid,task=task)
+                        cls.__arm_expiry(round_uuid,monotonic()+cls.ROUND_END_TIMEOUT)
                         response_body={}
                         response_body["uuid"]=round_uuid
                         response_body["message"]="A new game might have started"
@@ -1560,6 +3088,7 @@ class Server():
                                         "ERROR_MESSAGE":str(err)\
                                        }\
                                   )
+                        cls.ONLINE_ROUNDS.remove(round_uuid)
                         response_body={}
                         response_body["uuid"]=None
                         response_body["message"]="Failed to start a new online game"
@@ -1569,66 +3098,131 @@ class Server():
                 response_body["message"]="List of unoccupied games"
                 response_body["unoccupied"]=None
                 all_unoccupied=[]
-                for round_uuid in cls.ONLINE_ROUNDS:
-                    if cls.ONLINE_ROUNDS[round_uuid]["unoccupied_role"]!=""\
-                        and (datetime.now()-cls.ONLINE_ROUNDS[round_uuid]["last_visit"]).seconds<2:
+                for round_uuid in cls.ONLINE_ROUNDS.uuids():
+                    online_round=cls.ONLINE_ROUNDS.snapshot(round_uuid,"unoccupied_role","last_visit","watchers")
+                    if online_round is not None\
+                        and online_round.unoccupied_role!=""\
+                        and (monotonic()-online_round.last_visit<2\
+                             or online_round.watchers>0):
                             all_unoccupied.append(\
                                 {"round_uuid":round_uuid,\
-                                 "unoccupied_role":cls.ONLINE_ROUNDS[round_uuid]["unoccupied_role"]\
+                                 "unoccupied_role":online_round.unoccupied_role\
                                 }\
                             )
                 if len(all_unoccupied)>0:
                     response_body["unoccupied"]=random.choice(all_unoccupied)
             elif "uuid" in parameters and parameters["uuid"] in cls.ONLINE_ROUNDS:
-                if "display" in parameters:
-                    cls.ONLINE_ROUNDS[parameters["uuid"]]["last_visit"]=datetime.now()
+                if "display" in parameters or "watch" in parameters:
+                    round_uuid=parameters["uuid"]
+                    since=cls.__parse_count(parameters.get("since",""))
+                    with cls.ONLINE_ROUNDS.lock(round_uuid):
+                        online_round=cls.ONLINE_ROUNDS[round_uuid]
+                        online_round.last_visit=monotonic()
+                        if since is not None and since>online_round.version: ### unknown version, respond all tiles
+                            since=-1
+                        watch_future=None
+                        if "watch" in parameters and parameters.get("since",parameters.get("version",""))==str(online_round.version):
+                            if online_round.watch_future is None:
+                                online_round.watch_future=asyncio.get_running_loop().create_future()
+                            watch_future=online_round.watch_future
+                            online_round.watchers=online_round.watchers+1
+                    if watch_future is not None:
+                        ### long poll, it responds as soon as the version changes, or when LONG_POLL_TIMEOUT is reached
+                        try:
+                            await asyncio.wait_for(asyncio.shield(watch_future),cls.LONG_POLL_TIMEOUT)
+                        except asyncio.TimeoutError:
+                            pass
+                        finally:
+                            with cls.ONLINE_ROUNDS.lock(round_uuid):
+                                online_round.watchers=online_round.watchers-1
+                                online_round.last_visit=monotonic()
+                    ### a consistent copy, the round may be updated or removed in the meantime
+                    online_round=cls.ONLINE_ROUNDS.snapshot(round_uuid) or online_round
+                    if since==online_round.version:
+                        response_header("304 Not Modified",[])
+                        return [b""]
                     response_body={}
-                    response_body["uuid"]=parameters["uuid"]
+                    response_body["uuid"]=round_uuid
                     response_body["message"]="Current situation"
-                    response_body["board_tiles"]=deepcopy(cls.ONLINE_ROUNDS[parameters["uuid"]]["board_tiles"])
-                    response_body["attacker_type"]=cls.ONLINE_ROUNDS[parameters["uuid"]]["attacker_type"]
-                    response_body["attacker_wait"]=cls.ONLINE_ROUNDS[parameters["uuid"]]["attacker_wait"]
-                    response_body["defender_type"]=cls.ONLINE_ROUNDS[parameters["uuid"]]["defender_type"]
-                    response_body["defender_wait"]=cls.ONLINE_ROUNDS[parameters["uuid"]]["defender_wait"]
-                    response_body["unoccupied_role"]=cls.ONLINE_ROUNDS[parameters["uuid"]]["unoccupied_role"]
-                    response_body["last_visit"]=str(cls.ONLINE_ROUNDS[parameters["uuid"]]["last_visit"])
-                    response_body["last_update"]=str(cls.ONLINE_ROUNDS[parameters["uuid"]]["last_update"])
-                    response_body["round_score"]=cls.ONLINE_ROUNDS[parameters["uuid"]].get("round_score",-1)
+                    response_body["version"]=online_round.version
+                    if since is None:
+                        response_body["board_tiles"]=deepcopy(online_round.board_tiles)
+                    else:
+                        response_body["board_shape"]=online_round.board_shape
+                        response_body["changed_tiles"]=[[index,tile] for index,(tile,tile_version)\
+                                                        in enumerate(zip(online_round.flat_tiles,online_round.tile_versions))\
+                                                        if tile_version>since]
+                    response_body["attacker_type"]=online_round.attacker_type
+                    response_body["attacker_wait"]=online_round.attacker_wait
+                    response_body["defender_type"]=online_round.defender_type
+                    response_body["defender_wait"]=online_round.defender_wait
+                    response_body["unoccupied_role"]=online_round.unoccupied_role
+                    response_body["last_visit"]=str(Online_Round.get_datetime(online_round.last_visit))
+                    response_body["last_update"]=str(Online_Round.get_datetime(online_round.last_update))
+                    response_body["round_score"]=online_round.round_score
+                elif "replay" in parameters:
+                    response_body={}
+                    response_body["uuid"]=parameters["uuid"]
+                    cls.ONLINE_ROUNDS.update(parameters["uuid"],last_visit=monotonic())
+                    online_round=cls.ONLINE_ROUNDS.snapshot(parameters["uuid"],"round")
+                    record=None if online_round is None or online_round.round is None else online_round.round.get_record()
+                    if record is None:
+                        response_body["message"]="Replay is not possible now"
+                    else:
+                        try:
+                            ply=cls.__parse_count(parameters.get("ply",""))
+                            board=record.replay(ply)
+                            response_body["message"]="Replayed situation"
+                            response_body["ply"]=record.get_ply_count() if ply is None else ply
+                            response_body["ply_count"]=record.get_ply_count()
+                            response_body["board_tiles"]=board.get_tiles()
+                            response_body["round_score"]=record.get_round_score()
+                        except Exception as err:
+                            response_body["message"]="Replay is not possible: "+str(err)
                 elif "attack" in parameters:
                     response_body={}
                     response_body["uuid"]=parameters["uuid"]
-                    if cls.ONLINE_ROUNDS[parameters["uuid"]]["attacker_wait"]:
-                        cls.ONLINE_ROUNDS[parameters["uuid"]]["attacker_instruction"]={"keepgoing":True,"location":None}
-                        if parameters["attack"]!="giveup":
-                            cls.ONLINE_ROUNDS[parameters["uuid"]]["attacker_instruction"]["location"]=[]
-                            for dim in parameters["attack"].split(","):
-                                cls.ONLINE_ROUNDS[parameters["uuid"]]["attacker_instruction"]["location"].append(-1 if not dim.isnumeric() else int(dim))
-                            response_body["message"]="Attack instruction is sent"
-                            response_body["attacker_instruction"]=cls.ONLINE_ROUNDS[parameters["uuid"]]["attacker_instruction"]
+                    with cls.ONLINE_ROUNDS.lock(parameters["uuid"]):
+                        online_round=cls.ONLINE_ROUNDS.get(parameters["uuid"])
+                        if online_round is not None and online_round.attacker_wait:
+                            online_round.attacker_instruction["keepgoing"]=True
+                            online_round.attacker_instruction["location"]=None
+                            if parameters["attack"]!="giveup":
+                                online_round.attacker_instruction["location"]=[]
+                                for dim in parameters["attack"].split(","):
+                                    online_round.attacker_instruction["location"].append(cls.__parse_count(dim,-1))
+                                response_body["message"]="Attack instruction is sent"
+                                response_body["attacker_instruction"]=dict(online_round.attacker_instruction)
+                            else:
+                                online_round.attacker_instruction["keepgoing"]=False
+                                response_body["message"]="Attacker surrendered"
+                            online_round.attacker_wait=False
+                            cls.__hand_over(parameters["uuid"])
                         else:
-                            cls.ONLINE_ROUNDS[parameters["uuid"]]["attacker_instruction"]["keepgoing"]=False
-                            response_body["message"]="Attacker surrendered"
-                        cls.ONLINE_ROUNDS[parameters["uuid"]]["attacker_wait"]=False
-                    else:
-                        response_body["message"]="Attack is not possible now"
+                            response_body["message"]="Attack is not possible now"
                 elif "defend" in parameters:
                     response_body={}
                     response_body["uuid"]=parameters["uuid"]
-                    if cls.ONLINE_ROUNDS[parameters["uuid"]]["defender_wait"]:
-                        cls.ONLINE_ROUNDS[parameters["uuid"]]["defender_instruction"]={"keepgoing":True,"dimension":None,"direction":None}
-                        if parameters["defend"]!="giveup":
-                            dim_and_dir=parameters["defend"].split(",")
-                            if len(dim_and_dir)==2:
-                                cls.ONLINE_ROUNDS[parameters["uuid"]]["defender_instruction"]["dimension"]=-1 if not dim_and_dir[0].isnumeric() else int(dim_and_dir[0])
-                                cls.ONLINE_ROUNDS[parameters["uuid"]]["defender_instruction"]["direction"]=0 if dim_and_dir[1] not in ("-1","1") else int(dim_and_dir[1])
-                            response_body["message"]="Defend instruction is sent"
-                            response_body["defender_instruction"]=cls.ONLINE_ROUNDS[parameters["uuid"]]["defender_instruction"]
+                    with cls.ONLINE_ROUNDS.lock(parameters["uuid"]):
+                        online_round=cls.ONLINE_ROUNDS.get(parameters["uuid"])
+                        if online_round is not None and online_round.defender_wait:
+                            online_round.defender_instruction["keepgoing"]=True
+                            online_round.defender_instruction["dimension"]=None
+                            online_round.defender_instruction["direction"]=None
+                            if parameters["defend"]!="giveup":
+                                dim_and_dir=parameters["defend"].split(",")
+                                if len(dim_and_dir)==2:
+                                    online_round.defender_instruction["dimension"]=cls.__parse_count(dim_and_dir[0],-1)
+                                    online_round.defender_instruction["direction"]=0 if dim_and_dir[1] not in ("-1","1") else int(dim_and_dir[1])
+                                response_body["message"]="Defend instruction is sent"
+                                response_body["defender_instruction"]=dict(online_round.defender_instruction)
+                            else:
+                                online_round.defender_instruction["keepgoing"]=False
+                                response_body["message"]="Defender surrendered"
+                            online_round.defender_wait=False
+                            cls.__hand_over(parameters["uuid"])
                         else:
-                            cls.ONLINE_ROUNDS[parameters["uuid"]]["defender_instruction"]["keepgoing"]=False
-                            response_body["message"]="Defender surrendered"
-                        cls.ONLINE_ROUNDS[parameters["uuid"]]["defender_wait"]=False
-                    else:
-                        response_body["message"]="Defend is not possible now"
+                            response_body["message"]="Defend is not possible now"
                 else:
                     response_body={}
                     response_body["uuid"]=None
@@ -1639,51 +3233,256 @@ class Server():
                 response_body["message"]="Nothing happended"
             Logger.log("DEBUG","Message responded",\
                            "",\
-                           {"request_uuid":request_uuid,\
+                           lambda:{"request_uuid":request_uuid,\
                             "response_body":response_body\
                            }\
                       )
             return [bytes(json.dumps(response_body),"utf-8")]
-        cls.__is_stopped=False
-        with wsgi.make_server("",80,server_process,handler_class=cls.__class_for_hiding_console_log_only) as httpd:
-            httpd.serve_forever()
-        ### because of the WITH statement above
-        ### the two statements below won't run unless httpd.serve_forever() is interrupted
-        Logger.log("CRITICAL","Server is down",{"ERROR_MESSAGE":str(err)})
+        async def call_server_process(environment):
+            """call server_process() as a WSGI server does, return status, headers and body, an exception in it becomes 500"""
+            response={}
+            def response_header(status,headers):
+                response["status"]=status
+                response["headers"]=headers
+            try:
+                response_body=b"".join(await server_process(environment,response_header))
+            except Exception as err:
+                Logger.log("ERROR","Server process has something wrong",\
+                               "",\
+                               {"REMOTE_ADDR":environment["REMOTE_ADDR"],"QUERY_STRING":environment["QUERY_STRING"],"ERROR_MESSAGE":repr(err)}\
+                          )
+                return "500 Internal Server Error",[("Content-Type","text/plain")],b"Internal Server Error"
+            return response["status"],response["headers"],response_body
+        async def serve_connection(reader,writer):
+            """
+            a minimal HTTP/1.1 server in the event loop, it calls server_process() as a WSGI application does,
+            requests on a connection are served one after another until it's closed or idle for KEEP_ALIVE_TIMEOUT
+            """
+            remote_addr=(writer.get_extra_info("peername") or ("",))[0]
+            try:
+                while True:
+                    request_line=await asyncio.wait_for(reader.readline(),cls.KEEP_ALIVE_TIMEOUT)
+                    if request_line==b"":
+                        break
+                    method,target,version=request_line.decode("latin-1").split()
+                    request_headers={}
+                    while True:
+                        header_line=await reader.readline()
+                        if header_line in (b"\r\n",b"\n",b""):
+                            break
+                        name,_,value=header_line.decode("latin-1").partition(":")
+                        request_headers[name.strip().lower()]=value.strip()
+                    if int(request_headers.get("content-length","0"))>0: ### request body is useless
+                        await reader.readexactly(int(request_headers["content-length"]))
+                    path,_,query_string=target.partition("?")
+                    environment={"REQUEST_METHOD":method,"PATH_INFO":unquote(path),"QUERY_STRING":query_string,"REMOTE_ADDR":remote_addr}
+                    if request_headers.get("upgrade","").lower()=="websocket" and "sec-websocket-key" in request_headers:
+                        websocket_accept=b64encode(sha1(bytes(request_headers["sec-websocket-key"]+"258EAFA5-E914-47DA-95CA-C5AB0DC85B11","latin-1")).digest())
+                        writer.write(b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\nSec-WebSocket-Accept: "\
+                                     +websocket_accept+b"\r\n\r\n")
+                        await writer.drain()
+                        await serve_websocket(reader,writer,environment)
+                        break
+                    status,response_headers,response_body=await call_server_process(environment)
+                    connection=request_headers.get("connection","").lower()
+                    keep_alive=connection=="keep-alive" or version=="HTTP/1.1" and connection!="close"
+                    response_headers=response_headers+[("Content-Length",str(len(response_body))),\
+                                                       ("Connection","keep-alive" if keep_alive else "close")]
+                    writer.write(bytes(version+" "+status+"\r\n"\
+                                       +"".join(name+": "+value+"\r\n" for name,value in response_headers)+"\r\n","latin-1")\
+                                 +response_body)
+                    await writer.drain()
+                    if not keep_alive:
+                        break
+            except (asyncio.TimeoutError,asyncio.IncompleteReadError,ConnectionError,ValueError):
+                pass ### idle, broken or malformed connection, just close it, server_process() never raises to here
+            finally:
+                writer.close()
+        async def serve_websocket(reader,writer,environment):
+            """
+            a minimal WebSocket endpoint for a round, which is requested by ws://<your_ip_or_hostname>/?socket&uuid=<uuid>
+            each text message from the client is a QUERYSTRING such as defend=0,1, it's answered as server_process() does,
+            meanwhile the changes of the round are pushed as watch&since=<version> responds
+            """
+            round_uuid=""
+            for parameter_pair in environment["QUERY_STRING"].split("&"):
+                if parameter_pair.startswith("uuid="):
+                    round_uuid=unquote(parameter_pair[5:])
+            def send_frame(opcode,payload):
+                if len(payload)<126:
+                    writer.write(bytes([0x80|opcode,len(payload)])+payload)
+                elif len(payload)<65536:
+                    writer.write(bytes([0x80|opcode,126])+len(payload).to_bytes(2,"big")+payload)
+                else:
+                    writer.write(bytes([0x80|opcode,127])+len(payload).to_bytes(8,"big")+payload)
+            async def respond(query_string):
+                status,_,response_body=await call_server_process(dict(environment,QUERY_STRING=query_string))
+                return status,response_body
+            async def push():
+                version=-1
+                while True:
+                    status,response_body=await respond("watch&uuid="+round_uuid+"&since="+str(version))
+                    if status.startswith("200"):
+                        send_frame(1,response_body)
+                        await writer.drain()
+                        response_json=json.loads(response_body)
+                        if response_json["uuid"] is None: ### the round is gone
+                            break
+                        version=response_json["version"]
+            pusher=asyncio.ensure_future(push())
+            try:
+                message=b""
+                while True:
+                    frame_header=await reader.readexactly(2)
+                    opcode=frame_header[0]&0x0f
+                    length=frame_header[1]&0x7f
+                    if length==126:
+                        length=int.from_bytes(await reader.readexactly(2),"big")
+                    elif length==127:
+                        length=int.from_bytes(await reader.readexactly(8),"big")
+                    if opcode>=8 and (length>125 or not frame_header[0]&0x80): ### a control frame is short and never fragmented
+                        send_frame(8,(1002).to_bytes(2,"big")) ### protocol error
+                        await writer.drain()
+                        break
+                    elif opcode<8 and len(message)+length>cls.WEBSOCKET_MESSAGE_LIMIT:
+                        send_frame(8,(1009).to_bytes(2,"big")) ### message too big
+                        await writer.drain()
+                        break
+                    mask=await reader.readexactly(4) if frame_header[1]&0x80 else bytes(4)
+                    payload=bytes(byte^mask[index%4] for index,byte in enumerate(await reader.readexactly(length)))
+                    if opcode==8: ### close
+                        send_frame(8,payload[:2])
+                        await writer.drain()
+                        break
+                    elif opcode==9: ### ping
+                        send_frame(10,payload)
+                    elif opcode in (0,1): ### continuation or text
+                        message=message+payload
+                        if frame_header[0]&0x80:
+                            status,response_body=await respond(message.decode("utf-8")+"&uuid="+round_uuid)
+                            send_frame(1,response_body)
+                            message=b""
+                    await writer.drain()
+            finally:
+                pusher.cancel()
+        async def serve():
+            async with await asyncio.start_server(serve_connection,host or None,port) as http_server:
+                await http_server.serve_forever()
+        try:
+            asyncio.run_coroutine_threadsafe(serve(),cls.__LOOP).result()
+        except Exception as err:
+            Logger.log("CRITICAL","Server is down","",{"ERROR_MESSAGE":str(err)})
         cls.__is_stopped=True
 
+    @staticmethod
+    def __parse_count(text,default=None):
+        """isdigit() accepts digits such as ² that int() refuses, they get the default as well"""
+        if text.isdigit():
+            try:
+                return int(text)
+            except ValueError:
+                pass
+        return default
+
     @classmethod
-    def __clean_online_rounds(cls):
-        while True:
-            sleep(10)
-            rounds_to_be_deleted=[]
-            rounds_to_be_ended=[]
-            for round_uuid in cls.ONLINE_ROUNDS:
-                if not cls.ONLINE_ROUNDS[round_uuid]["thread"].is_alive() and (datetime.now()-cls.ONLINE_ROUNDS[round_uuid]["last_visit"]).seconds>30 and (datetime.now()-cls.ONLINE_ROUNDS[round_uuid]["last_update"]).seconds>30:
-                    rounds_to_be_deleted.append(round_uuid)
-                elif (datetime.now()-cls.ONLINE_ROUNDS[round_uuid]["last_visit"]).seconds>300 and (datetime.now()-cls.ONLINE_ROUNDS[round_uuid]["last_update"]).seconds>300:
-                    cls.ONLINE_ROUNDS[round_uuid]["attacker_instruction"]={"keepgoing":False,"location":None}
-                    cls.ONLINE_ROUNDS[round_uuid]["attacker_wait"]=False
-                    cls.ONLINE_ROUNDS[round_uuid]["defender_instruction"]={"keepgoing":False,"dimension":None,"direction":None}
-                    cls.ONLINE_ROUNDS[round_uuid]["defender_wait"]=False
-                    rounds_to_be_ended.append(round_uuid)
-            if len(rounds_to_be_ended)>0:
-                Logger.log("DEBUG","Ended pending rounds","",{"pending_rounds":rounds_to_be_ended})
-            for round_uuid in rounds_to_be_deleted:
-                del cls.ONLINE_ROUNDS[round_uuid]["round"]
-                del cls.ONLINE_ROUNDS[round_uuid]
-            if len(rounds_to_be_deleted)>0:
-                Logger.log("DEBUG","Cleaned dead rounds","",{"dead_rounds":rounds_to_be_deleted})
+    def __arm_expiry(cls,round_uuid,deadline):
+        """deadline is a monotonic() timestamp, it's converted to the clock of __LOOP"""
+        cls.__LOOP.call_at(cls.__LOOP.time()+deadline-monotonic(),cls.__expire,round_uuid)
+
+    @classmethod
+    def __check_round_task(cls,round_uuid,task):
+        if not task.cancelled() and task.exception() is not None:
+            Logger.log("ERROR","Round task failed",round_uuid,{"ERROR_MESSAGE":repr(task.exception())})
 
     @classmethod
-    def serve_forever(cls):
-        gc_thread=threading.Thread(target=cls.__clean_online_rounds)
-        gc_thread.setDaemon(True)
-        gc_thread.start()
+    def __expire(cls,round_uuid):
+        """
+        garbage collection of a round when its timer is due, in __LOOP only
+        a visit or an update doesn't touch the timer, it's re-armed here if the deadline has been put off since
+        """
+        online_round=cls.ONLINE_ROUNDS.snapshot(round_uuid,"task","last_visit","last_update")
+        if online_round is None: ### it has been deleted, the timer is obsolete
+            return
+        last_active=max(online_round.last_visit,online_round.last_update)
+        if online_round.task is not None and online_round.task.done():
+            deadline=last_active+cls.ROUND_DELETE_TIMEOUT
+            if deadline<=monotonic():
+                cls.ONLINE_ROUNDS.remove(round_uuid)
+                Logger.log("DEBUG","Cleaned a dead round",round_uuid)
+                return
+        else:
+            deadline=last_active+cls.ROUND_END_TIMEOUT
+            if deadline<=monotonic():
+                with cls.ONLINE_ROUNDS.lock(round_uuid):
+                    online_round=cls.ONLINE_ROUNDS.get(round_uuid)
+                    online_round.attacker_instruction["keepgoing"]=False
+                    online_round.attacker_instruction["location"]=None
+                    online_round.attacker_wait=False
+                    online_round.defender_instruction["keepgoing"]=False
+                    online_round.defender_instruction["dimension"]=None
+                    online_round.defender_instruction["direction"]=None
+                    online_round.defender_wait=False
+                    cls.__hand_over(round_uuid)
+                Logger.log("DEBUG","Ended a pending round",round_uuid)
+                deadline=monotonic()+cls.ROUND_DELETE_TIMEOUT
+        cls.__arm_expiry(round_uuid,deadline)
+
+    @classmethod
+    def __hand_over(cls,round_uuid):
+        def resolve():
+            online_round=cls.ONLINE_ROUNDS.snapshot(round_uuid,"instruction_future")
+            if online_round is None:
+                return
+            if online_round.instruction_future is not None and not online_round.instruction_future.done():
+                online_round.instruction_future.set_result(None)
+            cls.notify_watchers(round_uuid)
+        cls.__LOOP.call_soon_threadsafe(resolve)
+
+    @classmethod
+    def notify_watchers(cls,round_uuid,board_tiles=None):
+        with cls.ONLINE_ROUNDS.lock(round_uuid):
+            online_round=cls.ONLINE_ROUNDS.get(round_uuid)
+            if online_round is not None:
+                cls.__update_version(online_round,board_tiles)
+
+    @classmethod
+    def __update_version(cls,online_round,board_tiles):
+        online_round.version=online_round.version+1
+        if board_tiles is not None:
+            online_round.board_tiles=board_tiles
+            board_shape=[]
+            sub_tiles=board_tiles
+            while type(sub_tiles) is list:
+                board_shape.append(len(sub_tiles))
+                sub_tiles=sub_tiles[0] if len(sub_tiles)>0 else None
+            flat_tiles=board_tiles
+            while len(flat_tiles)>0 and type(flat_tiles[0]) is list:
+                flat_tiles=[tile for sub_tiles in flat_tiles for tile in sub_tiles]
+            if board_shape!=online_round.board_shape:
+                online_round.board_shape=board_shape
+                online_round.flat_tiles=[0]*len(flat_tiles)
+                online_round.tile_versions=[online_round.version]*len(flat_tiles)
+            for index,tile in enumerate(flat_tiles):
+                if tile!=online_round.flat_tiles[index]:
+                    online_round.flat_tiles[index]=tile
+                    online_round.tile_versions[index]=online_round.version
+        if online_round.watch_future is not None:
+            if not online_round.watch_future.done():
+                online_round.watch_future.set_result(None)
+            online_round.watch_future=None
+
+    @classmethod
+    def serve_forever(cls,*,host="",port=80,workers=4):
+        cls.__LOOP=asyncio.new_event_loop()
+        cls.__LOOP.set_default_executor(ThreadPoolExecutor(max_workers=workers))
+        loop_thread=threading.Thread(target=cls.__LOOP.run_forever)
+        loop_thread.setDaemon(True)
+        loop_thread.start()
         restart_count=0
         while True:
             if cls.__is_stopped:
-                server_thread=threading.Thread(target=cls.__server_daemon)
+                cls.__is_stopped=False
+                server_thread=threading.Thread(target=cls.__server_daemon,args=(host,port))
                 server_thread.setDaemon(True)
                 server_thread.start()
                 restart_count=restart_count+1
@@ -1694,7 +3493,7 @@ class Server():
 
 class Logger():
     """
-    logger is implemented with queue and file.write()
+    logger is implemented with queue and a buffered file.write()
 
     key properties:
         __LOGQUEUE          queue, store JSON message with this structure:
@@ -1704,24 +3503,53 @@ class Logger():
                                     "log_round_uuid":str_uuid,
                                     "log_details":{k:w,*}
                                     log_details dictionary does not have uniform definition
+        __EXCLUDED_LEVELS   frozenset, levels dropped by log() before they are serialized, set by start()
+        __LOG_FILE          file, buffered handle of the log file of the day, reopened when the day changes
+        __FILE_LOCK         threading.Lock, guard __LOG_FILE between __persist() and wait_till_finish()
+        BATCH_SIZE          int, at most how many messages are taken from __LOGQUEUE in one go
+        FLUSH_SIZE          int, how many characters can stay in the buffer of __LOG_FILE
+        FLUSH_INTERVAL      float, how many seconds a message can stay in the buffer of __LOG_FILE
 
     key methods:
-        log()               None, put a message into __LOGQUEUE
-        __persist()         None, get a message from __LOGQUEUE and write it into log file with infinite loop
+        is_enabled()        bool, whether messages of a level are kept, check it before building costly log_details
+        log()               None, put a message into __LOGQUEUE, log_details can be a callable returning the dictionary,
+                            it is called only if the level is enabled
+        __persist()         None, drain __LOGQUEUE in batches into __LOG_FILE with infinite loop, flush it on FLUSH_SIZE or FLUSH_INTERVAL
         start()             None, call __persist() in a child thread
-        wait_till_finish()  None, call queue.join() to block main thread, write last log before sys.exit()
+        __before_fork()     None, take __FILE_LOCK and flush __LOG_FILE, so nothing buffered is inherited by a child process
+        __after_fork()      None, release __FILE_LOCK in the parent process after fork
+        __forget()          None, in a forked child process, replace the queue, lock and file inherited from the parent
+        wait_till_finish()  None, call queue.join() to block main thread and flush __LOG_FILE, write last log before sys.exit()
 
     remarks:
         logger class is not allowed to initialize an instance.
+        worker processes of Simulator are forked, a child must not write what its parent has queued or buffered,
+        nor wait for a lock which another thread of the parent held at the moment of fork.
     """
     __LOGQUEUE=queue.Queue()
+    __EXCLUDED_LEVELS=frozenset()
+    __LOG_FILE=None
+    __FILE_LOCK=threading.Lock()
+    __FORK_HOOKED=False
+    __INHERITED_FILES=[]
+    BATCH_SIZE=1024
+    FLUSH_SIZE=65536
+    FLUSH_INTERVAL=1.0
 
     def __init__(self):
         raise Exception("Logger class is not allowed to initialize")
 
+    @classmethod
+    def is_enabled(cls,log_level):
+        return log_level not in cls.__EXCLUDED_LEVELS
+
     @classmethod
     def log(cls,log_level,log_message,log_round_uuid="",log_details={}):
+        if log_level in cls.__EXCLUDED_LEVELS:
+            return
         try:
+            if callable(log_details):
+                log_details=log_details()
             message=json.dumps({"log_datetime":str(datetime.now()),\
                                 "log_level":log_level,\
                                 "log_message":log_message,\
@@ -1736,27 +3564,71 @@ class Logger():
         cls.__LOGQUEUE.put(message)
 
     @classmethod
-    def __persist(cls,*,excluded_levels=[]):
-        if not os.path.exists(sys.path[0]+"/logs/"):
-                os.mkdir(sys.path[0]+"/logs/")
+    def __persist(cls):
+        os.makedirs(sys.path[0]+"/logs/",exist_ok=True) ### worker processes of Simulator start at the same time
+        unflushed=0
+        flushed_at=monotonic()
         while True:
-            log_line=cls.__LOGQUEUE.get()
-            log_file_name=sys.path[0]+"/logs/"+datetime.now().strftime("%Y-%m-%d")+".log"
-            if json.loads(log_line)["log_level"] not in excluded_levels:
-                with open(log_file_name,"a") as log_file:
-                    log_file.write(log_line)
-                    log_file.write("\n")
-            cls.__LOGQUEUE.task_done()
+            try: ### block while nothing is buffered, otherwise wake up in time to flush
+                log_lines=[cls.__LOGQUEUE.get(timeout=max(0,flushed_at+cls.FLUSH_INTERVAL-monotonic()) if unflushed>0 else None)]
+            except queue.Empty:
+                log_lines=[]
+            while len(log_lines)<cls.BATCH_SIZE:
+                try:
+                    log_lines.append(cls.__LOGQUEUE.get_nowait())
+                except queue.Empty:
+                    break
+            with cls.__FILE_LOCK:
+                if len(log_lines)>0:
+                    log_file_name=sys.path[0]+"/logs/"+datetime.now().strftime("%Y-%m-%d")+".log"
+                    if cls.__LOG_FILE is None or cls.__LOG_FILE.name!=log_file_name:
+                        if cls.__LOG_FILE is not None:
+                            cls.__LOG_FILE.close()
+                        cls.__LOG_FILE=open(log_file_name,"a",buffering=cls.FLUSH_SIZE)
+                    log_text="\n".join(log_lines)+"\n"
+                    cls.__LOG_FILE.write(log_text)
+                    unflushed+=len(log_text)
+                if unflushed>=cls.FLUSH_SIZE or unflushed>0 and monotonic()-flushed_at>=cls.FLUSH_INTERVAL:
+                    cls.__LOG_FILE.flush()
+                    unflushed=0
+                    flushed_at=monotonic()
+            for _ in log_lines:
+                cls.__LOGQUEUE.task_done()
+
+    @classmethod
+    def __before_fork(cls):
+        cls.__FILE_LOCK.acquire()
+        if cls.__LOG_FILE is not None:
+            cls.__LOG_FILE.flush()
+
+    @classmethod
+    def __after_fork(cls):
+        cls.__FILE_LOCK.release()
+
+    @classmethod
+    def __forget(cls):
+        if cls.__LOG_FILE is not None: ### kept from being closed, closing it would flush the buffer of the parent again
+            cls.__INHERITED_FILES.append(cls.__LOG_FILE)
+        cls.__LOGQUEUE=queue.Queue()
+        cls.__FILE_LOCK=threading.Lock()
+        cls.__LOG_FILE=None
 
     @classmethod
     def start(cls,*,excluded_levels=[]):
-        logger_thread=threading.Thread(target=cls.__persist,kwargs={"excluded_levels":excluded_levels})
+        if not cls.__FORK_HOOKED and hasattr(os,"register_at_fork"): ### fork is POSIX only
+            os.register_at_fork(before=cls.__before_fork,after_in_parent=cls.__after_fork,after_in_child=cls.__forget)
+            cls.__FORK_HOOKED=True
+        cls.__EXCLUDED_LEVELS=frozenset(excluded_levels)
+        logger_thread=threading.Thread(target=cls.__persist)
         logger_thread.setDaemon(True)
         logger_thread.start()
 
     @classmethod
     def wait_till_finish(cls):
         cls.__LOGQUEUE.join()
+        with cls.__FILE_LOCK:
+            if cls.__LOG_FILE is not None:
+                cls.__LOG_FILE.flush()
 
 
 def main():
@@ -1764,8 +3636,86 @@ def main():
     for index in range(1,len(sys.argv)):
         arg=(sys.argv[index].lstrip("-")).split("=")
         args[arg[0]]="" if len(arg)!=2 else arg[1]
-    Logger.start(excluded_levels=["DEBUG"] if "localonly" in args and args["localonly"]=="auto" else [])
-    if "localonly" in args:
+    Logger.start(excluded_levels=["DEBUG"] if "localonly" in args and args["localonly"]=="auto" or "simulate" in args or "replay" in args or "archive" in args else [])
+    if "simulate" in args:
+        try:
+            statistics=Simulator.run(int(args["simulate"]),\
+                                     board_shape=args.get("board_shape","[4,4]"),\
+                                     board_tiles=args.get("board_tiles","[]"),\
+                                     attacker_type=args.get("attacker_type","Random"),\
+                                     defender_type=args.get("defender_type","Random"),\
+                                     seed=int(args["seed"]) if "seed" in args else None,\
+                                     workers=int(args.get("workers","1")),\
+                                     vectorized="vectorized" in args)
+            print(json.dumps(statistics))
+        except (SystemExit,KeyboardInterrupt):
+            Logger.log("WARNING","Simulation is interrupted, quit by force")
+        except Exception as err:
+            Logger.log("ERROR","Simulation has something wrong",\
+                           "",\
+                           {"ERROR_MESSAGE":str(err)}\
+                      )
+        Logger.wait_till_finish()
+    elif "replay" in args:
+        try:
+            records=Game_Record.load_log(args["replay"])
+            for round_uuid in ([args["uuid"]] if "uuid" in args else records):
+                if round_uuid not in records:
+                    raise Exception("Round "+round_uuid+" is not recorded in "+args["replay"])
+                record=records[round_uuid]
+                ply=int(args["ply"]) if "ply" in args else record.get_ply_count()
+                print(json.dumps({"uuid":round_uuid,"ply":ply,"ply_count":record.get_ply_count(),\
+                                  "round_score":record.get_round_score(),"board_tiles":record.replay(ply).get_tiles()}))
+        except (SystemExit,KeyboardInterrupt):
+            Logger.log("WARNING","Replay is interrupted, quit by force")
+        except Exception as err:
+            Logger.log("ERROR","Replay has something wrong",\
+                           "",\
+                           {"ERROR_MESSAGE":str(err)}\
+                      )
+        Logger.wait_till_finish()
+    elif "archive" in args:
+        try:
+            print(json.dumps(Game_Archive.summarize(int(args["archive"]) if args["archive"].isnumeric() else 10)))
+        except (SystemExit,KeyboardInterrupt):
+            Logger.log("WARNING","Archive summary is interrupted, quit by force")
+        except Exception as err:
+            Logger.log("ERROR","Archive summary has something wrong",\
+                           "",\
+                           {"ERROR_MESSAGE":str(err)}\
+                      )
+        Logger.wait_till_finish()
+    elif "localonly" in args and args["localonly"]=="auto" and int(args.get("workers","1"))>1:
+        workers=int(args["workers"])
+        pool=Simulator.create_pool(workers) ### the same processes play every batch
+        while True: ### the same as below, but a batch of rounds at a time across processes
+            try:
+                statistics=Simulator.run(workers*16,\
+                                         board_shape=args.get("board_shape","[4,4]"),\
+                                         board_tiles=args.get("board_tiles","[]"),\
+                                         attacker_type={"Manual":"Random","Online":"Random"}.get(args.get("attacker_type","Random"),args.get("attacker_type","Random")),\
+                                         defender_type={"Manual":"Random","Online":"Random"}.get(args.get("defender_type","Random"),args.get("defender_type","Random")),\
+                                         workers=workers,\
+                                         quiet=False,\
+                                         pool=pool)
+                Logger.log("INFO","Localonly batch finished","",statistics)
+            except (SystemExit,KeyboardInterrupt):
+                Logger.log("WARNING","Localonly round is interrupted, quit by force")
+                pool.shutdown(cancel_futures=True)
+                Logger.wait_till_finish()
+                sys.exit()
+            except BrokenProcessPool as err:
+                Logger.log("ERROR","Localonly workers are broken, start new ones",\
+                               "",\
+                               {"ERROR_MESSAGE":str(err)}\
+                          )
+                pool=Simulator.create_pool(workers)
+            except Exception as err:
+                Logger.log("ERROR","Localonly round has something wrong",\
+                               "",\
+                               {"ERROR_MESSAGE":str(err)}\
+                          )
+    elif "localonly" in args:
         while True:
             try:
                 arg_board_shape=args.get("board_shape","[4,4]")
@@ -1810,7 +3760,9 @@ def main():
                           )
     else:
         try:
-            Server.serve_forever()
+            Server.serve_forever(host=args.get("host",""),\
+                                 port=int(args.get("port","80")),\
+                                 workers=int(args.get("workers","4")))
         except (SystemExit,KeyboardInterrupt):
             Logger.log("WARNING","Server is interrupted, quit by force")
             Logger.wait_till_finish()
@@ -0,0 +1,296 @@
+import random
+import sys
+from itertools import product
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0,str(Path(__file__).resolve().parent.parent))
+
+from abandoned_2048 import Board,Bit_Board,Board_Batch,Game_Archive,Game_Record,Round,Simulator
+
+
+def reference_move(tiles,shape,dimension,direction):
+    """move nested tiles by the game rules written out plainly, to check Board against"""
+    def get_tile(tiles,location):
+        for index in location:
+            tiles=tiles[index]
+        return tiles
+    def set_tile(tiles,location,tile):
+        for index in location[:-1]:
+            tiles=tiles[index]
+        tiles[location[-1]]=tile
+    moved=eval(repr(tiles)) ### a deep copy of nested lists of ints
+    other_ranges=[range(dim_length) if dim!=dimension else [None] for dim,dim_length in enumerate(shape)]
+    for lane_start in product(*other_ranges):
+        order=range(shape[dimension]) if direction==-1 else reversed(range(shape[dimension]))
+        locations=[lane_start[:dimension]+(index,)+lane_start[dimension+1:] for index in order]
+        numbers=[get_tile(tiles,location) for location in locations if get_tile(tiles,location)!=0]
+        merged=[]
+        while numbers:
+            if len(numbers)>1 and numbers[0]==numbers[1]:
+                merged.append(numbers[0]*2)
+                numbers=numbers[2:]
+            else:
+                merged.append(numbers[0])
+                numbers=numbers[1:]
+        merged=merged+[0]*(len(locations)-len(merged))
+        for location,tile in zip(locations,merged):
+            set_tile(moved,location,tile)
+    return moved
+
+
+def random_tiles(shape,rng):
+    numbers=[rng.choice([0,0,0,2,2,4,8,16,32,1024]) for _ in range(len(list(product(*[range(n) for n in shape]))))]
+    for dim_length in reversed(shape[1:]):
+        numbers=[numbers[index:index+dim_length] for index in range(0,len(numbers),dim_length)]
+    return numbers
+
+
+def test_merge_lane_does_not_combo():
+    lane,steps,score=Board.merge_lane([1,1,1,1])
+    assert lane==[2,2,0,0]
+    assert score==8
+    assert Board.merge_lane([0,0,0,0])==([0,0,0,0],0,0)
+
+
+def test_load_tiles_rejects_inappropriate_numbers():
+    for load_tiles in [[[1,1,0],[0,0,0],[0,0,0]],[[1,0,0,0],[0,0,0,0],[0,0,0,0],[0,0,0,0]],\
+                       [[3,0],[0,0]],[[-2,0],[0,0]]]:
+        with pytest.raises(Exception,match="not an appropriate number"):
+            Board(load_tiles=load_tiles)
+    assert Board(load_tiles=[[2,0,0],[0,4,0],[0,0,0]]).get_tiles()==[[2,0,0],[0,4,0],[0,0,0]]
+
+
+def test_4x4_board_is_bit_board():
+    assert type(Board((4,4))) is Bit_Board
+    assert type(Board(load_tiles=[[0]*4 for _ in range(4)])) is Bit_Board
+    assert type(Board((3,5))) is Board
+
+
+def test_moves_match_reference():
+    rng=random.Random(2048)
+    for shape in [(4,4),(3,5),(2,3,4)]:
+        for _ in range(150):
+            tiles=random_tiles(shape,rng)
+            legal_moves=[]
+            for dimension,direction in product(range(len(shape)),(-1,1)):
+                expected=reference_move(tiles,shape,dimension,direction)
+                board=Board.from_trusted(tiles)
+                assert board.get_shape()==shape
+                assert board.can_move(dimension,direction)==(expected!=tiles)
+                assert board.move(dimension,direction)==(expected!=tiles)
+                assert board.get_tiles()==expected
+                if expected!=tiles:
+                    legal_moves.append([dimension,direction])
+            assert Board.from_trusted(tiles).legal_moves()==legal_moves
+
+
+def test_can_move_and_legal_moves_leave_board_unchanged():
+    tiles=[[2,2,0,4],[0,0,0,0],[8,0,8,0],[0,0,0,2]]
+    board=Board.from_trusted(tiles)
+    board.legal_moves()
+    board.can_move(0,1)
+    assert board.get_tiles()==tiles
+
+
+def test_bit_board_falls_back_beyond_4_bits():
+    board=Board(load_tiles=[[32768,32768,0,0],[0,0,0,0],[0,0,0,0],[0,0,0,2]])
+    assert type(board) is Bit_Board
+    assert board.move(1,-1)
+    assert board.get_tiles()==[[65536,0,0,0],[0,0,0,0],[0,0,0,0],[2,0,0,0]]
+    assert board.move(0,1)
+    assert board.get_tiles()==[[0,0,0,0],[0,0,0,0],[65536,0,0,0],[2,0,0,0]]
+
+
+def test_clone_is_independent():
+    for shape in [(4,4),(3,3)]:
+        board=Board(shape)
+        assert board.place([0,0],2)
+        copied=board.clone()
+        assert copied.move(0,1)
+        assert board.get_tiles()!=copied.get_tiles()
+        assert board.get_exponents()[0]==1
+
+
+def test_place_and_empty_locations():
+    for shape in [(4,4),(2,3)]:
+        board=Board(shape)
+        assert len(board.get_empty_locations())==shape[0]*shape[1]
+        assert board.place([1,2],4)
+        assert not board.place([1,2],2)
+        assert not board.place([1,9])
+        assert (1,2) not in board.get_empty_locations()
+        assert board.get_tiles()[1][2]==4
+
+
+def test_board_batch_matches_board():
+    numpy=pytest.importorskip("numpy")
+    rng=random.Random(4096)
+    for shape in [(4,4),(3,5),(2,3,4)]:
+        tiles_list=[random_tiles(shape,rng) for _ in range(60)]
+        batch=Board_Batch(len(tiles_list),shape)
+        for index,tiles in enumerate(tiles_list):
+            batch.load_board(index,Board.from_trusted(tiles))
+        assert batch.legal_moves().tolist()==[[[dimension,direction] in Board.from_trusted(tiles).legal_moves()\
+                                               for dimension,direction in product(range(len(shape)),(-1,1))] for tiles in tiles_list]
+        mask=numpy.array([index%3!=0 for index in range(len(tiles_list))])
+        for dimension,direction in product(range(len(shape)),(-1,1)):
+            moved_batch=Board_Batch(len(tiles_list),shape)
+            for index,tiles in enumerate(tiles_list):
+                moved_batch.load_board(index,Board.from_trusted(tiles))
+            moved,scores=moved_batch.slide(dimension,direction,mask)
+            for index,tiles in enumerate(tiles_list):
+                board=Board.from_trusted(tiles)
+                steps,score=board.slide(dimension,direction) if mask[index] else (0,0)
+                assert moved[index]==(steps>0)
+                assert scores[index]==score
+                assert moved_batch.get_board(index).get_tiles()==board.get_tiles()
+
+
+def play_recorded_round(board_shape,seed):
+    """play a robot round step by step, return the round and the tiles before each ply"""
+    random.seed(seed)
+    round=Round(board_shape=board_shape,attacker_type="Random",defender_type="Random",quiet=True)
+    gameplay=round.play()
+    positions=[]
+    try:
+        player,tiles=next(gameplay)
+        while True:
+            positions.append(eval(repr(tiles)))
+            player,tiles=gameplay.send(player.think(tiles))
+    except StopIteration:
+        pass
+    return round,positions
+
+
+def test_game_record_replays_every_position():
+    for board_shape in ["[4,4]","[3,5]","[2,2,3]"]:
+        round,positions=play_recorded_round(board_shape,7)
+        record=round.get_record()
+        assert record.get_ply_count()==len(positions)-1
+        assert record.get_ply_count()>Game_Record.KEYFRAME_INTERVAL
+        for ply,tiles in enumerate(positions):
+            assert record.replay(ply).get_tiles()==tiles
+        assert record.replay().get_tiles()==positions[-1]
+        assert record.get_round_score()==round.get_summary()["round_score"]
+
+
+def test_game_record_round_trip():
+    round,positions=play_recorded_round("[4,4]",11)
+    data=round.get_record().to_bytes()
+    record=Game_Record.from_bytes(data)
+    assert record.to_bytes()==data
+    assert record.get_shape()==(4,4)
+    for ply in range(0,len(positions),13):
+        assert record.replay(ply).get_tiles()==positions[ply]
+    assert len(data)<2*record.get_ply_count()+16*(record.get_ply_count()//Game_Record.KEYFRAME_INTERVAL+1)+32
+
+
+def test_game_record_layout():
+    board=Board((2,3))
+    record=Game_Record(board.get_shape(),board.get_exponents(),interval=2)
+    board.place([1,2],4)
+    record.add_placement([1,2],board)
+    board.move(1,-1)
+    record.add_move(1,-1,board)
+    record.finish(0)
+    data=record.to_bytes()
+    assert data[:2]==bytes([Game_Record.VERSION,2])
+    assert data[2:4]==bytes([2,3])
+    assert data[4:10]==bytes(6) ### an empty initial board
+    assert int.from_bytes(data[10:12],"little")==2 ### keyframe interval
+    assert int.from_bytes(data[12:16],"little")==2 ### ply count
+    assert int.from_bytes(data[16:18],"little")==5<<1|1 ### offset 5, number 4
+    assert int.from_bytes(data[18:20],"little")==0x8000|1<<1 ### dimension 1, direction -1
+    assert data[20:26]==bytes([0,0,0,2,0,0]) ### keyframe after 2 plies
+    assert int.from_bytes(data[26:],"little",signed=True)==0
+
+
+def test_game_record_rejects_bad_input():
+    round,positions=play_recorded_round("[4,4]",3)
+    data=round.get_record().to_bytes()
+    for bad_data in [b"",bytes([99])+data[1:],data[:-1],data+b"\x00"]:
+        with pytest.raises(Exception):
+            Game_Record.from_bytes(bad_data)
+    record=Game_Record.from_bytes(data)
+    for bad_ply in [-1,record.get_ply_count()+1,"1"]:
+        with pytest.raises(Exception):
+            record.replay(bad_ply)
+
+
+@pytest.fixture
+def archive(tmp_path,monkeypatch):
+    monkeypatch.setattr(Game_Archive,"INDEX_FILE",str(tmp_path/"archive"/"games.idx"))
+    monkeypatch.setattr(Game_Archive,"RECORD_FILE",str(tmp_path/"archive"/"games.dat"))
+    return Game_Archive
+
+
+def play_archived_rounds(archive,count):
+    rounds=[]
+    for index in range(count):
+        random.seed(index)
+        round=Round(board_shape=["[4,4]","[3,3]","[2,3,4]"][index%3],\
+                    attacker_type=["Random","Strategy"][index%2],defender_type="Random",quiet=True)
+        round.start()
+        archive.append(round)
+        rounds.append(round)
+    return rounds
+
+
+def test_game_archive_is_empty_without_files(archive):
+    assert list(archive.scan())==[]
+    assert archive.summarize()["games"]==0
+
+
+def test_game_archive_entries_and_records(archive):
+    rounds=play_archived_rounds(archive,12)
+    entries=list(archive.scan())
+    assert len(entries)==12
+    assert Path(archive.INDEX_FILE).stat().st_size==80*12
+    for round,entry in zip(rounds,entries):
+        entry_dictionary=archive.to_dictionary(entry)
+        summary=round.get_summary()
+        assert entry_dictionary["uuid"]==round.get_uuid()
+        assert tuple(entry_dictionary["board_shape"])==round.get_record().get_shape()
+        assert entry_dictionary["attacker_type"]==round.get_attacker_type()
+        assert entry_dictionary["defender_type"]==round.get_defender_type()
+        assert entry_dictionary["round_score"]==summary["round_score"]
+        assert entry_dictionary["max_tile"]==summary["max_tile"]
+        assert entry_dictionary["moves"]==summary["moves"]
+        assert archive.get_record(entry).to_bytes()==round.get_record().to_bytes()
+
+
+def test_game_archive_ignores_and_truncates_a_torn_entry(archive):
+    play_archived_rounds(archive,2)
+    with open(archive.INDEX_FILE,"ab") as index_file:
+        index_file.write(b"\x01"*30)
+    assert len(list(archive.scan()))==2
+    rounds=play_archived_rounds(archive,1)
+    entries=list(archive.scan())
+    assert len(entries)==3
+    assert archive.to_dictionary(entries[-1])["uuid"]==rounds[0].get_uuid()
+
+
+def test_game_archive_summarize(archive):
+    rounds=play_archived_rounds(archive,10)
+    statistics=archive.summarize(3)
+    assert statistics["games"]==10
+    scores=sorted([round.get_summary()["round_score"] for round in rounds],reverse=True)
+    assert [entry["round_score"] for entry in statistics["leaderboard"]]==scores[:3]
+    assert sorted(statistics["players"])==["Random/Random","Strategy/Random"]
+    assert sum(players["games"] for players in statistics["players"].values())==10
+
+
+def test_simulator_is_the_same_across_workers():
+    statistics=[]
+    for workers in [1,2]:
+        statistics.append(Simulator.run(12,board_shape="[4,4]",attacker_type="Random",defender_type="Strategy",seed=2048,workers=workers))
+    with Simulator.create_pool(2) as pool:
+        for _ in range(2):
+            statistics.append(Simulator.run(12,board_shape="[4,4]",attacker_type="Random",defender_type="Strategy",seed=2048,workers=2,pool=pool))
+    for each in statistics:
+        for key in ["seconds","games_per_second","workers"]:
+            each.pop(key)
+    assert statistics[0]["games"]==12
+    assert all(each==statistics[0] for each in statistics[1:])